@@ -2,7 +2,21 @@ import static_ffmpeg
 
 static_ffmpeg.add_paths()
 
-from .exceptions import FileExtensionError, InvalidTokenError
+from .audio_store import AudioStore
+from .exceptions import (
+    APIError,
+    AuthError,
+    FileExtensionError,
+    InvalidRequestError,
+    InvalidTokenError,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+    RateLimitedError,
+    SynthesisCancelledError,
+)
+from .retry import RetryPolicy
+from .shared_cache import SharedCache
+from .timeouts import CancellationToken, Timeout
 from .tts_deepgram import TTS_Deepgram
 from .tts_elevenlabs import TTS_ElevenLabs
 from .tts_google import TTS_Google
@@ -0,0 +1,308 @@
+import socket
+import time
+from contextlib import contextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import Any, ContextManager, Dict, Iterator, Optional, Tuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from .exceptions import (
+    APIError,
+    AuthError,
+    InvalidRequestError,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+    RateLimitedError,
+    SynthesisCancelledError,
+)
+from .profiling import stage
+from .retry import RetryPolicy
+from .timeouts import CancellationToken, Deadline, Timeout
+
+# Connections kept alive per host; sized for a single engine instance shared by
+# many worker threads.
+POOL_MAXSIZE: int = 32
+
+# Largest read from a response body; cancellation and the overall deadline are
+# checked between reads while audio is downloading.
+CHUNK_SIZE: int = 65536
+
+
+def new_session() -> requests.Session:
+    """
+    Creates an HTTP session whose connection pool is shared by concurrent calls.
+
+    Returns:
+        requests.Session: The session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value (str, optional): The header value.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_from_status(
+    status_code: int,
+    text: str,
+    latency: Optional[float] = None,
+    retry_after: Optional[str] = None,
+) -> APIError:
+    """
+    Builds the APIError subclass matching an HTTP error status.
+
+    Args:
+        status_code (int): The HTTP status.
+        text (str): The response body, included in the message.
+        latency (float, optional): Seconds spent on the request.
+        retry_after (str, optional): The Retry-After header, if any.
+
+    Returns:
+        APIError: The classified error.
+    """
+    message = f"API Error: {status_code} - {text}"
+    if status_code == 429:
+        return RateLimitedError(
+            message, status_code, latency, parse_retry_after(retry_after)
+        )
+    if status_code in (401, 403):
+        return AuthError(message, status_code, latency)
+    if status_code in (408, 504):
+        return ProviderTimeoutError(message, status_code, latency)
+    if status_code >= 500:
+        return ProviderUnavailableError(message, status_code, latency)
+    if status_code >= 400:
+        return InvalidRequestError(message, status_code, latency)
+    return APIError(message, status_code, latency)
+
+
+def fetch(
+    session: requests.Session,
+    method: str,
+    url: str,
+    retry_policy: RetryPolicy,
+    timeout: Timeout,
+    cancel: Optional[CancellationToken] = None,
+    **kwargs: Any,
+) -> bytes:
+    """
+    Sends a synthesis request and returns the response body.
+
+    Transport failures and non-200 responses are raised as APIError
+    subclasses and retried according to retry_policy, within timeout.total.
+
+    Args:
+        session (requests.Session): The session to send the request with.
+        method (str): HTTP method.
+        url (str): Request URL.
+        retry_policy (RetryPolicy): Policy for retryable errors.
+        timeout (Timeout): Connect/read timeouts and overall deadline.
+        cancel (CancellationToken, optional): Aborts the request when cancelled.
+        **kwargs: Passed to requests.Session.request.
+
+    Returns:
+        bytes: The response body.
+
+    Raises:
+        APIError: If the request fails after any retries.
+        SynthesisCancelledError: If cancel is cancelled.
+    """
+    deadline = Deadline(timeout.total)
+
+    def attempt() -> bytes:
+        with _provider_errors(cancel, time.monotonic()):
+            resp = _open(session, method, url, timeout, deadline, cancel, kwargs)
+            with resp, _aborting(resp, cancel):
+                return b"".join(_iter_body(resp, timeout, deadline, cancel))
+
+    with stage("network"):
+        return retry_policy.call(attempt, deadline, cancel)
+
+
+def fetch_stream(
+    session: requests.Session,
+    method: str,
+    url: str,
+    retry_policy: RetryPolicy,
+    timeout: Timeout,
+    cancel: Optional[CancellationToken] = None,
+    **kwargs: Any,
+) -> Iterator[bytes]:
+    """
+    Sends a synthesis request and yields the response body as it arrives.
+
+    Failures are retried like fetch() until the first chunk has arrived. After
+    that nothing is retried, since the caller may already have used the audio,
+    and a failure is raised from the iteration. timeout.total covers the whole
+    body, including the time the caller spends between chunks.
+
+    Args:
+        session (requests.Session): The session to send the request with.
+        method (str): HTTP method.
+        url (str): Request URL.
+        retry_policy (RetryPolicy): Policy for retryable errors.
+        timeout (Timeout): Connect/read timeouts and overall deadline.
+        cancel (CancellationToken, optional): Aborts the request when cancelled.
+        **kwargs: Passed to requests.Session.request.
+
+    Yields:
+        bytes: The response body, in chunks of up to CHUNK_SIZE bytes.
+
+    Raises:
+        APIError: If the request fails after any retries, or while streaming.
+        SynthesisCancelledError: If cancel is cancelled.
+    """
+    deadline = Deadline(timeout.total)
+
+    def attempt() -> Tuple[requests.Response, Iterator[bytes], bytes]:
+        with _provider_errors(cancel, time.monotonic()):
+            resp = _open(session, method, url, timeout, deadline, cancel, kwargs)
+            try:
+                body = _iter_body(resp, timeout, deadline, cancel)
+                with _aborting(resp, cancel):
+                    return resp, body, next(body, b"")
+            except BaseException:
+                resp.close()
+                raise
+
+    with stage("network"):
+        resp, body, first = retry_policy.call(attempt, deadline, cancel)
+    with resp, _aborting(resp, cancel), _provider_errors(cancel, time.monotonic()):
+        if first:
+            yield first
+        yield from body
+
+
+def _open(
+    session: requests.Session,
+    method: str,
+    url: str,
+    timeout: Timeout,
+    deadline: Deadline,
+    cancel: Optional[CancellationToken],
+    kwargs: Dict[str, Any],
+) -> requests.Response:
+    """Sends a request and returns its streamed response, raising unless it is a 200."""
+    started = time.monotonic()
+    if cancel:
+        cancel.raise_if_cancelled()
+    deadline.check()
+    resp = session.request(
+        method,
+        url,
+        timeout=(deadline.clamp(timeout.connect), deadline.clamp(timeout.read)),
+        stream=True,
+        **kwargs,
+    )
+    if resp.status_code != 200:
+        with resp, _aborting(resp, cancel):
+            raise error_from_status(
+                resp.status_code,
+                resp.text,
+                time.monotonic() - started,
+                resp.headers.get("Retry-After"),
+            )
+    return resp
+
+
+@contextmanager
+def _provider_errors(
+    cancel: Optional[CancellationToken], started: float
+) -> Iterator[None]:
+    """Raises transport failures in the block as the matching APIError."""
+    try:
+        yield
+    except (APIError, SynthesisCancelledError):
+        raise
+    except Exception as e:
+        # Aborting the response on cancellation surfaces as an arbitrary
+        # urllib3/requests error; report it as the cancellation it is.
+        if cancel and cancel.cancelled:
+            raise SynthesisCancelledError() from e
+        if isinstance(e, (requests.Timeout, urllib3.exceptions.TimeoutError)):
+            raise ProviderTimeoutError(
+                str(e), latency=time.monotonic() - started
+            ) from e
+        if isinstance(
+            e, (requests.RequestException, urllib3.exceptions.HTTPError, OSError)
+        ):
+            raise ProviderUnavailableError(
+                str(e), latency=time.monotonic() - started
+            ) from e
+        raise
+
+
+def _aborting(
+    resp: requests.Response, cancel: Optional[CancellationToken]
+) -> ContextManager[None]:
+    """Aborts resp if cancel is cancelled while the block runs."""
+    return cancel.on_cancel(partial(_abort, resp)) if cancel else nullcontext()
+
+
+def _socket(resp: requests.Response) -> Optional[socket.socket]:
+    """Returns the socket a streamed response is being read from, if known."""
+    connection = getattr(resp.raw, "connection", None)
+    return getattr(connection, "sock", None)
+
+
+def _abort(resp: requests.Response) -> None:
+    """Closes a streamed response, waking a thread blocked reading it."""
+    sock = _socket(resp)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    resp.close()
+
+
+def _iter_body(
+    resp: requests.Response,
+    timeout: Timeout,
+    deadline: Deadline,
+    cancel: Optional[CancellationToken],
+) -> Iterator[bytes]:
+    """
+    Reads a streamed response body, checking cancel and the deadline between reads.
+
+    Each read returns whatever has arrived (up to CHUNK_SIZE) and blocks for no
+    longer than the time left, so a slow provider cannot hold the call past its
+    deadline.
+    """
+    sock = _socket(resp)
+    read = getattr(resp.raw, "read1", resp.raw.read)
+    while True:
+        if cancel:
+            cancel.raise_if_cancelled()
+        deadline.check()
+        if sock is not None:
+            sock.settimeout(deadline.clamp(timeout.read))
+        chunk = read(CHUNK_SIZE, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
@@ -1,9 +1,28 @@
 import io
+import threading
+import time
+from types import TracebackType
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
 
 import pyaudio
 
+from .exceptions import SynthesisCancelledError
+from .profiling import stage
+from .timeouts import CancellationToken
+
 
 class AudioPlayer:
+    """
+    Plays raw PCM audio through PyAudio.
+
+    play_bytes() plays audio that is complete in memory. Audio that arrives
+    incrementally, e.g. segments still being downloaded, goes through
+    play_stream() or open_stream(), which play it through a jitter buffer.
+
+    These may be called from several threads at once; opening and closing
+    streams is serialized because PortAudio does not allow it concurrently.
+    """
+
     def __init__(self, chunk_size: int = 512) -> None:
         """
         Initializes the AudioPlayer with a given chunk size.
@@ -13,9 +32,21 @@ class AudioPlayer:
         """
         self.chunk_size = chunk_size
         self.p = pyaudio.PyAudio()
+        self._lock = threading.Lock()
+        self._totals: Dict[str, float] = {
+            "streams": 0,
+            "underruns": 0,
+            "played": 0.0,
+            "silence": 0.0,
+        }
 
     def play_bytes(
-        self, audio_data: bytes, channels: int, sample_width: int, frame_rate: int
+        self,
+        audio_data: bytes,
+        channels: int,
+        sample_width: int,
+        frame_rate: int,
+        cancel: Optional[CancellationToken] = None,
     ) -> None:
         """
         Plays audio data directly from bytes or a BytesIO object.
@@ -25,21 +56,432 @@ class AudioPlayer:
             channels (int): Number of audio channels (1 for mono, 2 for stereo).
             sample_width (int): Sample width in bytes (e.g., 2 for 16-bit audio).
             frame_rate (int): Frame rate (sampling rate in Hz).
+            cancel (CancellationToken, optional): Stops playback when cancelled.
+
+        Raises:
+            SynthesisCancelledError: If cancel is cancelled during playback.
+        """
+
+        with stage("playback"):
+            audio = io.BytesIO(audio_data)
+            with self._lock:
+                stream = self.p.open(
+                    format=self.p.get_format_from_width(sample_width),
+                    channels=channels,
+                    rate=frame_rate,
+                    output=True,
+                )
+
+            try:
+                data = audio.read(self.chunk_size)
+
+                while data:
+                    if cancel:
+                        cancel.raise_if_cancelled()
+                    stream.write(data)
+                    data = audio.read(self.chunk_size)
+            finally:
+                with self._lock:
+                    stream.stop_stream()
+                    stream.close()
+
+    def open_stream(
+        self,
+        channels: int,
+        sample_width: int,
+        frame_rate: int,
+        cancel: Optional[CancellationToken] = None,
+        **options: Any,
+    ) -> "BufferedStream":
         """
+        Opens a jitter-buffered stream for audio that arrives incrementally.
 
-        audio = io.BytesIO(audio_data)
-        stream = self.p.open(
-            format=self.p.get_format_from_width(sample_width),
-            channels=channels,
-            rate=frame_rate,
-            output=True,
+        Args:
+            channels (int): Number of audio channels (1 for mono, 2 for stereo).
+            sample_width (int): Sample width in bytes (e.g., 2 for 16-bit audio).
+            frame_rate (int): Frame rate (sampling rate in Hz).
+            cancel (CancellationToken, optional): Stops playback when cancelled.
+            **options: Buffer settings passed to BufferedStream.
+
+        Returns:
+            BufferedStream: The stream, already waiting for audio.
+        """
+        return BufferedStream(
+            self, channels, sample_width, frame_rate, cancel=cancel, **options
         )
 
-        data = audio.read(self.chunk_size)
+    def play_stream(
+        self,
+        chunks: Iterable[Tuple[bytes, int, int, int]],
+        cancel: Optional[CancellationToken] = None,
+        **options: Any,
+    ) -> None:
+        """
+        Plays PCM chunks through a jitter buffer as they are produced.
 
-        while data:
-            stream.write(data)
-            data = audio.read(self.chunk_size)
+        Consecutive chunks with the same format are played as one continuous
+        stream; a format change drains the stream and opens a new one.
+
+        Args:
+            chunks (Iterable): (raw_audio, channels, sample_width, frame_rate)
+                tuples, e.g. decoded segments as they finish downloading.
+            cancel (CancellationToken, optional): Stops playback when cancelled.
+            **options: Buffer settings passed to BufferedStream.
+
+        Raises:
+            SynthesisCancelledError: If cancel is cancelled during playback.
+        """
+        stream: Optional[BufferedStream] = None
+        try:
+            for raw_audio, channels, sample_width, frame_rate in chunks:
+                audio_format = (channels, sample_width, frame_rate)
+                if stream is not None and stream.format != audio_format:
+                    stream.close()
+                    stream = None
+                if stream is None:
+                    stream = self.open_stream(*audio_format, cancel=cancel, **options)
+                stream.write(raw_audio)
+            if stream is not None:
+                stream.close()
+        except BaseException:
+            if stream is not None:
+                stream.abort()
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns playback counters summed over the streams this player closed.
+
+        Returns:
+            dict: ``streams``; ``underruns``; ``played``, the seconds of audio
+            played; ``silence``, the seconds of silence inserted on underruns.
+        """
+        with self._lock:
+            return dict(self._totals)
+
+    def _record(self, stats: Dict[str, float]) -> None:
+        with self._lock:
+            self._totals["streams"] += 1
+            for name in ("underruns", "played", "silence"):
+                self._totals[name] += stats[name]
+
+
+class BufferedStream:
+    """
+    A playback stream fed with audio as it arrives, through a jitter buffer.
+
+    write() appends audio and returns immediately; a playback thread plays it
+    in periods of ``period`` seconds. Playback starts once the buffer holds the
+    target prebuffer, which adapts to the observed arrivals: it grows with the
+    jitter of the intervals between writes and, when audio arrives slower than
+    it is played (frame_rate * sample_width * channels bytes per second), with
+    the shortfall over ``horizon`` seconds.
+
+    If the buffer runs dry mid-stream, that is counted as an underrun: the
+    stream plays silence instead of stalling the device (which would click),
+    raises its prebuffer floor, and resumes once the buffer is refilled to the
+    target. close() plays out what is left.
+
+    Use AudioPlayer.open_stream() rather than creating streams directly.
+
+    Args:
+        player (AudioPlayer): The player the stream belongs to.
+        channels (int): Number of audio channels.
+        sample_width (int): Sample width in bytes.
+        frame_rate (int): Frame rate in Hz.
+        cancel (CancellationToken, optional): Stops playback when cancelled.
+        min_prebuffer (float): Smallest target prebuffer, in seconds.
+        max_prebuffer (float): Largest target prebuffer, in seconds.
+        max_buffered (float, optional): Seconds of audio buffered before
+            write() blocks; None for no limit.
+        period (float): Seconds of audio written to the device at a time.
+        horizon (float): Seconds of playback the prebuffer should cover when
+            audio arrives slower than it is played.
+    """
+
+    def __init__(
+        self,
+        player: AudioPlayer,
+        channels: int,
+        sample_width: int,
+        frame_rate: int,
+        cancel: Optional[CancellationToken] = None,
+        min_prebuffer: float = 0.05,
+        max_prebuffer: float = 1.0,
+        max_buffered: Optional[float] = 30.0,
+        period: float = 0.02,
+        horizon: float = 2.0,
+    ) -> None:
+        if not 0 <= min_prebuffer <= max_prebuffer:
+            raise ValueError("Expected 0 <= min_prebuffer <= max_prebuffer")
+        if max_buffered is not None and max_buffered < max_prebuffer:
+            raise ValueError("max_buffered must be at least max_prebuffer")
+
+        self.format: Tuple[int, int, int] = (channels, sample_width, frame_rate)
+        self.min_prebuffer = min_prebuffer
+        self.max_prebuffer = max_prebuffer
+        self.max_buffered = max_buffered
+        self.horizon = horizon
+        self._player = player
+        self._cancel = cancel
+        self._frame_size = channels * sample_width
+        # Bytes of PCM played per second.
+        self._rate = frame_rate * self._frame_size
+        self._period_bytes = max(1, round(period * frame_rate)) * self._frame_size
+
+        self._cond = threading.Condition()
+        self._buffer = bytearray()
+        self._closed = False
+        self._aborted = False
+        self._error: Optional[BaseException] = None
+
+        # Arrival statistics, updated by write().
+        self._first_arrival: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+        self._received = 0
+        self._first_bytes = 0
+        self._gap: Optional[float] = None
+        self._gap_dev = 0.0
+        self._floor = min_prebuffer
+
+        # Playback statistics, updated by the playback thread.
+        self._underruns = 0
+        self._played = 0
+        self._silence = 0
+        self._low_watermark: Optional[int] = None
+        self._startup: Optional[float] = None
 
-        stream.stop_stream()
-        stream.close()
+        self._thread = threading.Thread(
+            target=self._run, name="speech-engine-jitter-buffer", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "BufferedStream":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data: bytes) -> None:
+        """
+        Appends audio to the buffer.
+
+        Blocks only while the buffer holds more than max_buffered seconds.
+
+        Args:
+            data (bytes): Raw PCM in the stream's format.
+
+        Raises:
+            SynthesisCancelledError: If cancel is cancelled.
+            Exception: An error raised by the output device.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._raise_if_failed()
+            if self._closed:
+                raise ValueError("write() on a closed stream")
+
+            if self._last_arrival is None:
+                self._first_arrival = now
+                self._first_bytes = len(data)
+            else:
+                # Smoothed interval between writes and its mean deviation, as
+                # in TCP's RTT estimator (RFC 6298).
+                gap = now - self._last_arrival
+                if self._gap is None:
+                    self._gap, self._gap_dev = gap, gap / 2
+                else:
+                    self._gap_dev += (abs(gap - self._gap) - self._gap_dev) / 4
+                    self._gap += (gap - self._gap) / 8
+            self._last_arrival = now
+            self._received += len(data)
+
+            limit: Optional[int] = None
+            if self.max_buffered is not None:
+                limit = self._seconds_to_bytes(self.max_buffered)
+            while limit is not None and len(self._buffer) >= limit:
+                self._cond.wait(0.1)
+                self._raise_if_failed()
+            self._buffer += data
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """
+        Marks the end of the audio and waits until it has been played.
+
+        Raises:
+            SynthesisCancelledError: If cancel is cancelled.
+            Exception: An error raised by the output device.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        with stage("playback"):
+            self._thread.join()
+        with self._cond:
+            self._raise_if_failed()
+
+    def abort(self) -> None:
+        """Stops playback immediately, discarding buffered audio."""
+        with self._cond:
+            self._closed = True
+            self._aborted = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def target_prebuffer(self) -> float:
+        """
+        Returns the seconds of audio buffered before playback (re)starts.
+
+        Returns:
+            float: The target, between min_prebuffer and max_prebuffer.
+        """
+        with self._cond:
+            return self._target() / self._rate
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the buffer's metrics.
+
+        Returns:
+            dict: ``buffered``, the seconds of audio waiting to be played;
+            ``low_watermark``, the fewest seconds buffered while playing;
+            ``target_prebuffer`` in seconds; ``jitter``, the mean deviation of
+            the interval between writes in seconds; ``arrival_rate`` and
+            ``consumption_rate`` in bytes per second; ``underruns``;
+            ``played`` and ``silence`` in seconds; ``startup_latency``, the
+            seconds from the first write until playback started.
+        """
+        with self._cond:
+            low = self._low_watermark
+            return {
+                "buffered": len(self._buffer) / self._rate,
+                "low_watermark": (low if low is not None else 0) / self._rate,
+                "target_prebuffer": self._target() / self._rate,
+                "jitter": self._gap_dev,
+                "arrival_rate": self._arrival_rate() or 0.0,
+                "consumption_rate": float(self._rate),
+                "underruns": self._underruns,
+                "played": self._played / self._rate,
+                "silence": self._silence / self._rate,
+                "startup_latency": self._startup or 0.0,
+            }
+
+    def _seconds_to_bytes(self, seconds: float) -> int:
+        return int(seconds * self._rate) // self._frame_size * self._frame_size
+
+    def _arrival_rate(self) -> Optional[float]:
+        """Returns the average bytes received per second since the first write."""
+        if self._first_arrival is None or self._last_arrival is None:
+            return None
+        elapsed = self._last_arrival - self._first_arrival
+        if elapsed <= 0:
+            return None
+        # The first write arrived at elapsed 0, so count only the later ones.
+        return (self._received - self._first_bytes) / elapsed
+
+    def _target(self) -> int:
+        """Returns the target prebuffer in bytes. Requires self._cond."""
+        seconds = 4 * self._gap_dev
+        arrival_rate = self._arrival_rate()
+        if arrival_rate is not None and arrival_rate < self._rate:
+            seconds += (1 - arrival_rate / self._rate) * self.horizon
+        seconds = min(self.max_prebuffer, max(self._floor, seconds))
+        return self._seconds_to_bytes(seconds)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+        if self._cancel:
+            self._cancel.raise_if_cancelled()
+
+    def _run(self) -> None:
+        try:
+            p = self._player.p
+            channels, sample_width, frame_rate = self.format
+            with self._player._lock:
+                stream = p.open(
+                    format=p.get_format_from_width(sample_width),
+                    channels=channels,
+                    rate=frame_rate,
+                    output=True,
+                )
+            try:
+                self._play(stream)
+            finally:
+                with self._player._lock:
+                    stream.stop_stream()
+                    stream.close()
+        except BaseException as e:
+            with self._cond:
+                self._error = e
+                self._cond.notify_all()
+        finally:
+            self._player._record(self.stats())
+
+    def _next(self, playing: bool) -> Tuple[bool, Optional[bytes]]:
+        """
+        Waits for the next period to write. Requires self._cond.
+
+        Returns:
+            tuple: Whether playback is running and the audio to write; None
+            when the stream is finished, or silence while refilling after an
+            underrun.
+        """
+        silence = bytes(self._period_bytes)
+        while True:
+            if self._aborted:
+                return False, None
+            if self._cancel and self._cancel.cancelled:
+                raise SynthesisCancelledError()
+
+            level = len(self._buffer)
+            if not playing and (level >= self._target() or self._closed):
+                playing = True
+                if self._startup is None and self._first_arrival is not None:
+                    self._startup = time.monotonic() - self._first_arrival
+
+            if playing and (level >= self._period_bytes or (self._closed and level)):
+                data = bytes(self._buffer[: self._period_bytes])
+                del self._buffer[: self._period_bytes]
+                remaining = len(self._buffer)
+                if not self._closed and (
+                    self._low_watermark is None or remaining < self._low_watermark
+                ):
+                    # The final drain after close() is not a low point.
+                    self._low_watermark = remaining
+                self._played += len(data)
+                self._cond.notify_all()
+                return True, data
+            if self._closed:
+                return False, None
+
+            if playing:
+                # Starved mid-stream: make the next prebuffer larger.
+                self._underruns += 1
+                self._floor = min(
+                    self.max_prebuffer, max(self._floor, self.min_prebuffer) * 1.5
+                )
+                playing = False
+            if self._startup is not None:
+                # Keep the device fed while refilling.
+                self._silence += len(silence)
+                return False, silence
+            self._cond.wait(0.05)
+
+    def _play(self, stream: Any) -> None:
+        playing = False
+        while True:
+            with self._cond:
+                playing, data = self._next(playing)
+            if data is None:
+                return
+            stream.write(data)
@@ -0,0 +1,587 @@
+"""
+Vectorized post-processing for the PCM audio produced by the TTS engines.
+
+All functions operate on float32 NumPy arrays of shape ``(frames, channels)``
+with samples in the range ``[-1.0, 1.0]``. Use :func:`pcm_to_array` and
+:func:`array_to_pcm` to convert from and to the raw bytes accepted by
+:meth:`AudioPlayer.play_bytes`.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import time
+import wave
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+
+_BLOCK_SECONDS: float = 0.4
+_BLOCK_STEP_SECONDS: float = 0.1
+_ABSOLUTE_GATE_LUFS: float = -70.0
+_RELATIVE_GATE_LU: float = -10.0
+_RESAMPLE_CHUNK: int = 8192
+
+
+def pcm_to_array(raw_audio: bytes, channels: int, sample_width: int) -> np.ndarray:
+    """
+    Converts interleaved PCM bytes into a float32 sample array.
+
+    Args:
+        raw_audio (bytes): Interleaved little-endian PCM data.
+        channels (int): Number of audio channels.
+        sample_width (int): Sample width in bytes (1, 2, 3 or 4).
+
+    Returns:
+        np.ndarray: Samples of shape (frames, channels) in the range [-1.0, 1.0].
+
+    Raises:
+        ValueError: If the sample width is not supported.
+    """
+    if sample_width == 1:
+        data = np.frombuffer(raw_audio, dtype=np.uint8).astype(np.float32)
+        data = (data - 128.0) / 128.0
+    elif sample_width == 2:
+        data = np.frombuffer(raw_audio, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        packed = np.frombuffer(raw_audio, dtype=np.uint8).reshape(-1, 3)
+        widened = (
+            packed[:, 0].astype(np.int32)
+            | (packed[:, 1].astype(np.int32) << 8)
+            | (packed[:, 2].astype(np.int32) << 16)
+        )
+        widened = np.where(widened & 0x800000, widened - 0x1000000, widened)
+        data = widened.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        data = np.frombuffer(raw_audio, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    frames = len(data) // channels
+    return data[: frames * channels].reshape(frames, channels)
+
+
+def array_to_pcm(samples: np.ndarray, sample_width: int = 2) -> bytes:
+    """
+    Converts a float sample array back into interleaved PCM bytes.
+
+    Samples outside [-1.0, 1.0] are clipped.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        sample_width (int): Output sample width in bytes (1, 2, 3 or 4).
+
+    Returns:
+        bytes: Interleaved little-endian PCM data.
+
+    Raises:
+        ValueError: If the sample width is not supported.
+    """
+    clipped = np.clip(np.asarray(samples, dtype=np.float64).reshape(-1), -1.0, 1.0)
+
+    if sample_width == 1:
+        return np.round(clipped * 127.0 + 128.0).astype(np.uint8).tobytes()
+    if sample_width == 2:
+        return np.round(clipped * 32767.0).astype("<i2").tobytes()
+    if sample_width == 3:
+        widened = np.round(clipped * 8388607.0).astype("<i4")
+        return widened.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    if sample_width == 4:
+        return np.round(clipped * 2147483647.0).astype("<i4").tobytes()
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def read_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decodes WAV bytes, as returned by the Deepgram, Wit.ai and PlayAI engines.
+
+    Args:
+        data (bytes): A complete WAV file.
+
+    Returns:
+        tuple: The sample array and its frame rate.
+    """
+    with wave.open(io.BytesIO(data), "rb") as wav_file:
+        channels: int = wav_file.getnchannels()
+        sample_width: int = wav_file.getsampwidth()
+        frame_rate: int = wav_file.getframerate()
+        raw_audio: bytes = wav_file.readframes(wav_file.getnframes())
+
+    return pcm_to_array(raw_audio, channels, sample_width), frame_rate
+
+
+def write_wav(samples: np.ndarray, frame_rate: int, sample_width: int = 2) -> bytes:
+    """
+    Encodes a sample array as WAV bytes.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        frame_rate (int): Frame rate in Hz.
+        sample_width (int): Output sample width in bytes.
+
+    Returns:
+        bytes: A complete WAV file.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(samples.shape[1])
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(frame_rate)
+        wav_file.writeframes(array_to_pcm(samples, sample_width))
+    return buffer.getvalue()
+
+
+def apply_gain(samples: np.ndarray, gain_db: float) -> np.ndarray:
+    """
+    Scales the samples by the given gain.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        gain_db (float): Gain in decibels.
+
+    Returns:
+        np.ndarray: The scaled samples.
+    """
+    return (samples * np.float32(10.0 ** (gain_db / 20.0))).astype(np.float32)
+
+
+def rms_dbfs(samples: np.ndarray) -> float:
+    """
+    Returns the RMS level of the samples in dBFS.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+
+    Returns:
+        float: The RMS level, or -inf for digital silence.
+    """
+    if samples.size == 0:
+        return -math.inf
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    return 20.0 * math.log10(rms) if rms > 0 else -math.inf
+
+
+def normalize_rms(
+    samples: np.ndarray, target_dbfs: float = -20.0, peak_dbfs: float = -1.0
+) -> np.ndarray:
+    """
+    Applies a gain so the RMS level of the samples matches the target.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        target_dbfs (float): Target RMS level in dBFS.
+        peak_dbfs (float): The gain is reduced so the peak never exceeds this level.
+
+    Returns:
+        np.ndarray: The normalized samples.
+    """
+    current = rms_dbfs(samples)
+    if current == -math.inf:
+        return samples.copy()
+    return apply_gain(samples, _limit_gain(samples, target_dbfs - current, peak_dbfs))
+
+
+def _biquad_response(
+    b: Tuple[float, float, float], a: Tuple[float, float, float], w: np.ndarray
+) -> np.ndarray:
+    """Evaluates the magnitude response of a biquad at the angular frequencies w."""
+    z1 = np.exp(-1j * w)
+    z2 = z1 * z1
+    return np.abs((b[0] + b[1] * z1 + b[2] * z2) / (a[0] + a[1] * z1 + a[2] * z2))
+
+
+def _k_weighting_response(frame_rate: int, n_fft: int) -> np.ndarray:
+    """Returns the ITU-R BS.1770 K-weighting magnitude response for rfft bins."""
+    w = 2.0 * np.pi * np.fft.rfftfreq(n_fft) if n_fft else np.zeros(0)
+
+    # Stage 1: high shelf (+4 dB at 1500 Hz) modelling the head.
+    gain = 10.0 ** (4.0 / 40.0)
+    w0 = 2.0 * np.pi * 1500.0 / frame_rate
+    alpha = np.sin(w0) / (2.0 * (1.0 / np.sqrt(2.0)))
+    cos_w0 = np.cos(w0)
+    root = 2.0 * np.sqrt(gain) * alpha
+    shelf = _biquad_response(
+        (
+            gain * ((gain + 1) + (gain - 1) * cos_w0 + root),
+            -2 * gain * ((gain - 1) + (gain + 1) * cos_w0),
+            gain * ((gain + 1) + (gain - 1) * cos_w0 - root),
+        ),
+        (
+            (gain + 1) - (gain - 1) * cos_w0 + root,
+            2 * ((gain - 1) - (gain + 1) * cos_w0),
+            (gain + 1) - (gain - 1) * cos_w0 - root,
+        ),
+        w,
+    )
+
+    # Stage 2: RLB high-pass at 38 Hz.
+    w0 = 2.0 * np.pi * 38.0 / frame_rate
+    alpha = np.sin(w0) / (2.0 * 0.5)
+    cos_w0 = np.cos(w0)
+    highpass = _biquad_response(
+        ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2),
+        (1 + alpha, -2 * cos_w0, 1 - alpha),
+        w,
+    )
+
+    return shelf * highpass
+
+
+def integrated_loudness(samples: np.ndarray, frame_rate: int) -> float:
+    """
+    Measures the integrated loudness of the samples (ITU-R BS.1770).
+
+    The K-weighting filter is applied in the frequency domain, which yields the
+    same power spectrum as the reference IIR filter without a per-sample loop.
+    All channels are weighted equally.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        frame_rate (int): Frame rate in Hz.
+
+    Returns:
+        float: Loudness in LUFS, or -inf if every block is below the absolute gate.
+    """
+    frames = samples.shape[0]
+    if frames == 0:
+        return -math.inf
+
+    n_fft = 1 << (frames - 1).bit_length()
+    spectrum = np.fft.rfft(samples.astype(np.float64), n=n_fft, axis=0)
+    spectrum *= _k_weighting_response(frame_rate, n_fft)[:, None]
+    weighted = np.fft.irfft(spectrum, n=n_fft, axis=0)[:frames]
+
+    block = int(round(_BLOCK_SECONDS * frame_rate))
+    step = int(round(_BLOCK_STEP_SECONDS * frame_rate))
+    energy = np.concatenate(
+        [np.zeros((1, samples.shape[1])), np.cumsum(np.square(weighted), axis=0)]
+    )
+    if frames < block:
+        starts = np.array([0])
+        block = frames
+    else:
+        starts = np.arange(0, frames - block + 1, step)
+    mean_square = (energy[starts + block] - energy[starts]) / block
+    power = mean_square.sum(axis=1)
+
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10.0 * np.log10(power)
+
+    gated = power[block_loudness > _ABSOLUTE_GATE_LUFS]
+    if gated.size == 0:
+        return -math.inf
+
+    relative_gate = -0.691 + 10.0 * math.log10(gated.mean()) + _RELATIVE_GATE_LU
+    gated = power[
+        (block_loudness > _ABSOLUTE_GATE_LUFS) & (block_loudness > relative_gate)
+    ]
+    return -0.691 + 10.0 * math.log10(gated.mean())
+
+
+def normalize_loudness(
+    samples: np.ndarray,
+    frame_rate: int,
+    target_lufs: float = -16.0,
+    peak_dbfs: float = -1.0,
+) -> np.ndarray:
+    """
+    Applies a gain so the integrated loudness of the samples matches the target.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        frame_rate (int): Frame rate in Hz.
+        target_lufs (float): Target integrated loudness in LUFS.
+        peak_dbfs (float): The gain is reduced so the peak never exceeds this level.
+
+    Returns:
+        np.ndarray: The normalized samples.
+    """
+    current = integrated_loudness(samples, frame_rate)
+    if current == -math.inf:
+        return samples.copy()
+    return apply_gain(samples, _limit_gain(samples, target_lufs - current, peak_dbfs))
+
+
+def _limit_gain(samples: np.ndarray, gain_db: float, peak_dbfs: float) -> float:
+    """Reduces gain_db so the scaled peak stays at or below peak_dbfs."""
+    peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+    if peak <= 0:
+        return gain_db
+    return min(gain_db, peak_dbfs - 20.0 * math.log10(peak))
+
+
+def resample(
+    samples: np.ndarray, orig_rate: int, target_rate: int, half_taps: int = 16
+) -> np.ndarray:
+    """
+    Resamples the samples with a polyphase windowed-sinc filter.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        orig_rate (int): The current frame rate in Hz.
+        target_rate (int): The desired frame rate in Hz.
+        half_taps (int): Zero crossings on each side of the filter; higher is
+            sharper and slower.
+
+    Returns:
+        np.ndarray: The resampled samples.
+    """
+    if orig_rate == target_rate:
+        return samples.astype(np.float32, copy=True)
+
+    divisor = math.gcd(orig_rate, target_rate)
+    up = target_rate // divisor
+    down = orig_rate // divisor
+
+    cutoff = 1.0 / max(up, down)
+    half = half_taps * max(up, down)
+    n = np.arange(-half, half + 1)
+    kernel = up * cutoff * np.sinc(cutoff * n) * np.kaiser(2 * half + 1, 8.0)
+    kernel = np.concatenate([kernel, np.zeros((-len(kernel)) % up)])
+    taps = len(kernel) // up
+    # phases[p, i] holds kernel[i * up + p]
+    phases = kernel.reshape(taps, up).T.astype(np.float32)
+
+    frames, channels = samples.shape
+    out_frames = -(-frames * up // down)
+    padded = np.concatenate(
+        [
+            np.zeros((taps, channels), dtype=np.float32),
+            samples.astype(np.float32),
+            np.zeros((taps, channels), dtype=np.float32),
+        ]
+    )
+    offsets = taps - np.arange(taps)
+
+    output = np.empty((out_frames, channels), dtype=np.float32)
+    for start in range(0, out_frames, _RESAMPLE_CHUNK):
+        positions = np.arange(start, min(start + _RESAMPLE_CHUNK, out_frames))
+        upsampled = positions * down + half
+        indices = (upsampled // up)[:, None] + offsets[None, :]
+        output[positions] = np.einsum(
+            "mt,mtc->mc", phases[upsampled % up], padded[indices]
+        )
+    return output
+
+
+def mix_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    """
+    Converts the samples to the given number of channels.
+
+    Downmixing averages the source channels; upmixing from mono duplicates the
+    signal, other upmixes go through a mono downmix first.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        channels (int): The desired number of channels.
+
+    Returns:
+        np.ndarray: Samples of shape (frames, channels).
+    """
+    current = samples.shape[1]
+    if current == channels:
+        return samples.copy()
+    mono = samples if current == 1 else samples.mean(axis=1, keepdims=True)
+    if channels == 1:
+        return mono.astype(np.float32)
+    return np.repeat(mono, channels, axis=1).astype(np.float32)
+
+
+def trim_silence(
+    samples: np.ndarray,
+    frame_rate: int,
+    threshold_dbfs: float = -50.0,
+    window_ms: float = 10.0,
+    padding_ms: float = 0.0,
+) -> np.ndarray:
+    """
+    Removes leading and trailing silence.
+
+    Args:
+        samples (np.ndarray): Samples of shape (frames, channels).
+        frame_rate (int): Frame rate in Hz.
+        threshold_dbfs (float): Windows with an RMS level below this are silence.
+        window_ms (float): Analysis window length in milliseconds.
+        padding_ms (float): Silence to keep on each side of the detected audio.
+
+    Returns:
+        np.ndarray: The trimmed samples; empty if the input is entirely silent.
+    """
+    window = max(1, int(frame_rate * window_ms / 1000.0))
+    frames = samples.shape[0]
+    windows = -(-frames // window)
+    if windows == 0:
+        return samples.copy()
+
+    padded = np.zeros((windows * window, samples.shape[1]), dtype=np.float32)
+    padded[:frames] = samples
+    power = np.square(padded).reshape(windows, -1).mean(axis=1)
+    loud = np.flatnonzero(power > 10.0 ** (threshold_dbfs / 10.0))
+    if loud.size == 0:
+        return samples[:0].copy()
+
+    padding = int(frame_rate * padding_ms / 1000.0)
+    start = max(0, int(loud[0]) * window - padding)
+    end = min(frames, (int(loud[-1]) + 1) * window + padding)
+    return samples[start:end].copy()
+
+
+def crossfade_concat(
+    segments: Iterable[np.ndarray], frame_rate: int, crossfade_ms: float = 10.0
+) -> np.ndarray:
+    """
+    Joins segments with an equal-power crossfade between neighbours.
+
+    Args:
+        segments (Iterable[np.ndarray]): Segments with the same channel count.
+        frame_rate (int): Frame rate in Hz.
+        crossfade_ms (float): Overlap between consecutive segments in milliseconds.
+
+    Returns:
+        np.ndarray: The joined samples.
+
+    Raises:
+        ValueError: If no segments are given.
+    """
+    parts: List[np.ndarray] = list(segments)
+    if not parts:
+        raise ValueError("At least one segment is required")
+
+    fade = int(frame_rate * crossfade_ms / 1000.0)
+    overlaps = [min(fade, len(prev), len(nxt)) for prev, nxt in zip(parts, parts[1:])]
+    total = sum(len(part) for part in parts) - sum(overlaps)
+
+    output = np.zeros((total, parts[0].shape[1]), dtype=np.float32)
+    output[: len(parts[0])] = parts[0]
+    position = len(parts[0])
+    for part, overlap in zip(parts[1:], overlaps):
+        start = position - overlap
+        if overlap:
+            t = np.linspace(0.0, np.pi / 2.0, overlap, dtype=np.float32)[:, None]
+            output[start:position] *= np.cos(t)
+            output[start:position] += part[:overlap] * np.sin(t)
+        output[position : start + len(part)] = part[overlap:]
+        position = start + len(part)
+    return output
+
+
+def process_pcm(
+    raw_audio: bytes,
+    channels: int,
+    sample_width: int,
+    frame_rate: int,
+    target_frame_rate: Optional[int] = None,
+    target_channels: Optional[int] = None,
+    target_sample_width: Optional[int] = None,
+    gain_db: float = 0.0,
+    target_lufs: Optional[float] = None,
+    trim_threshold_dbfs: Optional[float] = None,
+) -> Tuple[bytes, int, int, int]:
+    """
+    Runs the full post-processing chain on raw PCM bytes.
+
+    Stages run in the order trim, resample, channel mix, loudness
+    normalization and gain; each stage is skipped when its option is unset.
+
+    Args:
+        raw_audio (bytes): Interleaved PCM data.
+        channels (int): Number of audio channels.
+        sample_width (int): Sample width in bytes.
+        frame_rate (int): Frame rate in Hz.
+        target_frame_rate (int, optional): Output frame rate.
+        target_channels (int, optional): Output channel count.
+        target_sample_width (int, optional): Output sample width in bytes.
+        gain_db (float): Extra gain in decibels, applied last.
+        target_lufs (float, optional): Integrated loudness to normalize to.
+        trim_threshold_dbfs (float, optional): Silence threshold for trimming.
+
+    Returns:
+        tuple: (raw_audio, channels, sample_width, frame_rate), in the order
+        expected by AudioPlayer.play_bytes.
+    """
+    samples = pcm_to_array(raw_audio, channels, sample_width)
+
+    if trim_threshold_dbfs is not None:
+        samples = trim_silence(samples, frame_rate, trim_threshold_dbfs)
+    if target_frame_rate and target_frame_rate != frame_rate:
+        samples = resample(samples, frame_rate, target_frame_rate)
+        frame_rate = target_frame_rate
+    if target_channels and target_channels != channels:
+        samples = mix_channels(samples, target_channels)
+        channels = target_channels
+    if target_lufs is not None:
+        samples = normalize_loudness(samples, frame_rate, target_lufs)
+    if gain_db:
+        samples = apply_gain(samples, gain_db)
+
+    sample_width = target_sample_width or sample_width
+    return array_to_pcm(samples, sample_width), channels, sample_width, frame_rate
+
+
+def benchmark(
+    raw_audio: bytes,
+    channels: int,
+    sample_width: int,
+    frame_rate: int,
+    target_frame_rate: int = 44100,
+    target_channels: int = 2,
+    repeat: int = 5,
+) -> Dict[str, float]:
+    """
+    Compares this module against the pydub conversion chain used by TTS_Google.
+
+    Both paths convert the input to 16-bit PCM at the target frame rate and
+    channel count; the best of ``repeat`` runs is reported for each.
+
+    Args:
+        raw_audio (bytes): Interleaved PCM data.
+        channels (int): Number of audio channels.
+        sample_width (int): Sample width in bytes.
+        frame_rate (int): Frame rate in Hz.
+        target_frame_rate (int): Output frame rate.
+        target_channels (int): Output channel count.
+        repeat (int): Number of timed runs per path.
+
+    Returns:
+        dict: ``pydub_seconds``, ``numpy_seconds`` and ``speedup``.
+    """
+    segment = AudioSegment(
+        data=raw_audio,
+        sample_width=sample_width,
+        frame_rate=frame_rate,
+        channels=channels,
+    )
+
+    def run_pydub() -> None:
+        segment.set_frame_rate(target_frame_rate).set_sample_width(2).set_channels(
+            target_channels
+        ).raw_data
+
+    def run_numpy() -> None:
+        process_pcm(
+            raw_audio,
+            channels,
+            sample_width,
+            frame_rate,
+            target_frame_rate=target_frame_rate,
+            target_channels=target_channels,
+            target_sample_width=2,
+        )
+
+    timings: Dict[str, float] = {}
+    for name, func in (("pydub_seconds", run_pydub), ("numpy_seconds", run_numpy)):
+        best = math.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    timings["speedup"] = (
+        timings["pydub_seconds"] / timings["numpy_seconds"]
+        if timings["numpy_seconds"]
+        else math.inf
+    )
+    return timings
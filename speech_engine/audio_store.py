@@ -0,0 +1,538 @@
+"""
+Content-addressed on-disk store for synthesized audio.
+
+Audio is kept once per distinct content, as a blob named by its SHA-256 digest.
+A SQLite index maps each render, identified by :func:`render_key` over
+(engine, voice, params, text), to its blob and counts the renders referencing
+every blob. Saving a render that is already stored does not synthesize or
+write it again: the target file is created as a hard link to the blob (or a
+copy across filesystems), and :meth:`AudioStore.open` serves blobs through
+mmap.
+
+Layout of the store directory::
+
+    index.sqlite3          renders and blobs tables (WAL mode)
+    blobs/ab/abcdef...     blob files, read-only
+    tmp/                   partially written blobs
+
+Blobs no render refers to any more are removed by :meth:`AudioStore.compact`,
+which :meth:`AudioStore.start_compaction` runs periodically on a background
+thread. Exported files are hard links, so they stay valid after their blob is
+compacted away; they are read-only and should be replaced rather than
+rewritten in place.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    engine TEXT NOT NULL,
+    voice TEXT,
+    params TEXT NOT NULL,
+    text TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest),
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_unreferenced ON blobs (refcount) WHERE refcount = 0;
+"""
+
+# Leftover temporary blobs older than this are assumed to belong to a writer
+# that crashed and are removed by compaction.
+_STALE_TMP_SECONDS: float = 3600.0
+
+
+def render_key(
+    engine: str, voice: Optional[str], params: Dict[str, Any], text: str
+) -> str:
+    """
+    Returns the key identifying a render: the same inputs give the same audio.
+
+    Args:
+        engine (str): Engine name, e.g. "deepgram".
+        voice (str, optional): The voice used.
+        params (dict): Other synthesis parameters; must be JSON-serializable.
+        text (str): The synthesized text.
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON encoding of the inputs.
+    """
+    canonical = json.dumps(
+        [engine, voice, params, text],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _temp_path(target: str) -> str:
+    """Returns a temporary path next to target, unique to the calling thread."""
+    return f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def write_file(filename: str, audio: bytes) -> None:
+    """
+    Writes audio to filename without changing files hard-linked to it.
+
+    The engines' save() writes through this. A file exported from an
+    AudioStore is a hard link to a stored blob, and truncating it in place
+    would change the audio of every render sharing the blob, so a target with
+    more than one link is replaced instead. Any other target is written in
+    place as open(filename, "wb") would, keeping symlinks, mode and ownership.
+
+    Args:
+        filename (str): The target path.
+        audio (bytes): The file contents.
+    """
+    try:
+        linked = os.stat(filename).st_nlink > 1
+    except FileNotFoundError:
+        linked = False
+    if not linked:
+        with open(filename, "wb") as f:
+            f.write(audio)
+        return
+
+    target = os.path.abspath(filename)
+    tmp = _temp_path(target)
+    try:
+        # Left behind by a crashed writer; may itself be a link to a blob.
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class AudioStore:
+    """
+    A content-addressed audio store shared by every engine's save().
+
+    Instances are thread-safe, and several processes may use the same
+    directory: index updates run in SQLite IMMEDIATE transactions.
+
+    Args:
+        root (str): Directory of the store; created if missing.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        self._blob_dir: str = os.path.join(self.root, "blobs")
+        self._tmp_dir: str = os.path.join(self.root, "tmp")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.root, "index.sqlite3"),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._db, self._lock)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def put(
+        self,
+        key: str,
+        audio: bytes,
+        engine: str,
+        voice: Optional[str],
+        params: Dict[str, Any],
+        text: str,
+    ) -> str:
+        """
+        Stores the audio of a render, writing the blob only if it is new.
+
+        Args:
+            key (str): The render key, from render_key().
+            audio (bytes): The encoded audio.
+            engine (str): Engine name.
+            voice (str, optional): The voice used.
+            params (dict): Other synthesis parameters.
+            text (str): The synthesized text.
+
+        Returns:
+            str: The digest of the blob holding the audio.
+        """
+        digest = hashlib.sha256(audio).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+
+        with self._transaction() as db:
+            previous = db.execute(
+                "SELECT digest FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+            if previous and previous[0] == digest:
+                return digest
+
+            if not db.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone() or not os.path.exists(path):
+                self._write_blob(path, audio)
+                db.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, "
+                    "COALESCE((SELECT refcount FROM blobs WHERE digest = ?), 0), ?)",
+                    (digest, len(audio), digest, now),
+                )
+
+            db.execute(
+                "UPDATE blobs SET refcount = refcount + 1 WHERE digest = ?", (digest,)
+            )
+            if previous:
+                db.execute(
+                    "UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?",
+                    (previous[0],),
+                )
+            db.execute(
+                "INSERT OR REPLACE INTO renders VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    engine,
+                    voice,
+                    json.dumps(params, sort_keys=True),
+                    text,
+                    digest,
+                    now,
+                ),
+            )
+        return digest
+
+    def _write_blob(self, path: str, audio: bytes) -> None:
+        """Writes a blob atomically and makes it read-only."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def path(self, key: str) -> Optional[str]:
+        """
+        Returns the blob file of a render.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            str: Path of the read-only blob, or None if the render is not stored.
+        """
+        digest = self._lookup(key)
+        return self._blob_path(digest) if digest else None
+
+    def open(self, key: str) -> Optional[mmap.mmap]:
+        """
+        Maps the audio of a render into memory, without copying it.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            mmap.mmap: A read-only mapping the caller should close, or None if
+            the render is not stored.
+        """
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the audio of a render.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            bytes: The audio, or None if the render is not stored.
+        """
+        mapping = self.open(key)
+        if mapping is None:
+            return None
+        with mapping:
+            return mapping[:]
+
+    def export(self, key: str, filename: str) -> bool:
+        """
+        Places the audio of a stored render at filename.
+
+        The file is a hard link to the blob, or a copy if the store is on
+        another filesystem. An existing file is replaced atomically.
+
+        Args:
+            key (str): The render key.
+            filename (str): The target path.
+
+        Returns:
+            bool: False if the render is not stored.
+        """
+        path = self.path(key)
+        if path is None:
+            return False
+
+        target = os.path.abspath(filename)
+        tmp = _temp_path(target)
+        try:
+            # Left behind by a crashed writer with the same pid and thread id.
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(path, tmp)
+        except FileNotFoundError:
+            # Compacted away since the lookup.
+            return False
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            try:
+                shutil.copyfile(path, tmp)
+            except FileNotFoundError:
+                return False
+        try:
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return True
+
+    def save(
+        self,
+        filename: str,
+        engine: str,
+        voice: Optional[str],
+        params: Dict[str, Any],
+        text: str,
+        synthesize: Callable[[], bytes],
+    ) -> None:
+        """
+        Saves a render to filename, synthesizing it only if it is not stored.
+
+        This is what the engines' save(..., store=...) calls.
+
+        Args:
+            filename (str): The target path.
+            engine (str): Engine name.
+            voice (str, optional): The voice used.
+            params (dict): Other synthesis parameters.
+            text (str): The text to synthesize.
+            synthesize (Callable): Returns the encoded audio on a miss.
+        """
+        key = render_key(engine, voice, params, text)
+        if self.export(key, filename):
+            return
+        self.put(key, synthesize(), engine, voice, params, text)
+        if not self.export(key, filename):
+            raise FileNotFoundError(f"Blob for render {key} vanished during save")
+
+    def release(self, key: str) -> bool:
+        """
+        Removes a render from the index, dropping its reference to the blob.
+
+        The blob itself is removed by the next compaction once nothing else
+        refers to it.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            bool: False if the render was not stored.
+        """
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT digest FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False
+            db.execute("DELETE FROM renders WHERE key = ?", (key,))
+            db.execute(
+                "UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?", (row[0],)
+            )
+        return True
+
+    def compact(self) -> int:
+        """
+        Deletes unreferenced blobs and leftovers of interrupted writes.
+
+        Returns:
+            int: Bytes freed.
+        """
+        freed = 0
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT digest, size FROM blobs WHERE refcount = 0"
+            ).fetchall()
+            db.execute("DELETE FROM blobs WHERE refcount = 0")
+            for digest, size in rows:
+                try:
+                    os.unlink(self._blob_path(digest))
+                    freed += size
+                except FileNotFoundError:
+                    pass
+
+            # Writes happen inside the same lock, so any blob file without a
+            # row is an orphan.
+            known = {row[0] for row in db.execute("SELECT digest FROM blobs")}
+            for path in self._blob_files():
+                if os.path.basename(path) not in known:
+                    freed += os.path.getsize(path)
+                    os.unlink(path)
+
+        cutoff = time.time() - _STALE_TMP_SECONDS
+        for entry in os.scandir(self._tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    freed += entry.stat().st_size
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def _blob_files(self) -> Iterator[str]:
+        for shard in os.scandir(self._blob_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    yield entry.path
+
+    def start_compaction(self, interval: float = 300.0) -> None:
+        """
+        Runs compact() every interval seconds on a daemon thread.
+
+        Args:
+            interval (float): Seconds between compactions.
+        """
+        if self._compactor is not None:
+            return
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except sqlite3.OperationalError:
+                    # The index is busy; try again next interval.
+                    pass
+
+        self._compactor = threading.Thread(
+            target=run, name="speech-engine-store-compaction", daemon=True
+        )
+        self._compactor.start()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns counts describing the store.
+
+        Returns:
+            dict: ``renders``; ``blobs``; ``stored_bytes``, the size of all blobs;
+            ``logical_bytes``, the size of all renders; and ``unreferenced``,
+            the blobs waiting for compaction.
+        """
+        with self._lock:
+            renders, logical = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                "FROM renders JOIN blobs USING (digest)"
+            ).fetchone()
+            blobs, stored, unreferenced = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(refcount = 0), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "renders": renders,
+            "blobs": blobs,
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            "unreferenced": unreferenced,
+        }
+
+    def close(self) -> None:
+        """Stops background compaction and closes the index."""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> AudioStore:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _Transaction:
+    """An IMMEDIATE transaction holding the store's thread lock."""
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.Lock) -> None:
+        self._db = db
+        self._lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._db
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        try:
+            self._db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self._lock.release()
@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class FileExtensionError(Exception):
     def __init__(self, message: str = "Output file type should be .mp3") -> None:
         self.message = message
@@ -8,3 +11,106 @@ class InvalidTokenError(Exception):
     def __init__(self, message: str = "Invalid AuthToken") -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class APIError(Exception):
+    """
+    A TTS provider failed to synthesize speech.
+
+    Attributes:
+        status_code (int, optional): HTTP status, if a response was received.
+        latency (float, optional): Seconds spent on the failed request.
+        retryable (bool): Whether repeating the request may succeed.
+    """
+
+    retryable: bool = False
+
+    def __init__(
+        self,
+        message: str = "API Error",
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+    ) -> None:
+        self.message = message
+        self.status_code = status_code
+        self.latency = latency
+        super().__init__(self.message)
+
+
+class RateLimitedError(APIError):
+    """
+    The provider rejected the request because of rate limiting (HTTP 429).
+
+    Attributes:
+        retry_after (float, optional): Seconds the provider asked to wait.
+    """
+
+    retryable = True
+
+    def __init__(
+        self,
+        message: str = "Rate limited",
+        status_code: Optional[int] = 429,
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        self.retry_after = retry_after
+        super().__init__(message, status_code, latency)
+
+
+class ProviderUnavailableError(APIError):
+    """The provider is down, overloaded or unreachable (HTTP 5xx)."""
+
+    retryable = True
+
+    def __init__(
+        self,
+        message: str = "Provider unavailable",
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+    ) -> None:
+        super().__init__(message, status_code, latency)
+
+
+class ProviderTimeoutError(APIError):
+    """The request to the provider timed out."""
+
+    retryable = True
+
+    def __init__(
+        self,
+        message: str = "Request timed out",
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+    ) -> None:
+        super().__init__(message, status_code, latency)
+
+
+class InvalidRequestError(APIError):
+    """The provider rejected the request itself, e.g. text too long (HTTP 4xx)."""
+
+    def __init__(
+        self,
+        message: str = "Invalid request",
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+    ) -> None:
+        super().__init__(message, status_code, latency)
+
+
+class AuthError(APIError):
+    """The provider rejected the credentials (HTTP 401/403)."""
+
+    def __init__(
+        self,
+        message: str = "Authentication failed",
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+    ) -> None:
+        super().__init__(message, status_code, latency)
+
+
+class SynthesisCancelledError(Exception):
+    def __init__(self, message: str = "Synthesis cancelled") -> None:
+        self.message = message
+        super().__init__(self.message)
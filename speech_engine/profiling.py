@@ -0,0 +1,374 @@
+"""
+Opt-in profiling of engine calls.
+
+While profiling is active, every engine ``speak()``, ``save()`` and
+``synthesize()`` call records the wall and CPU time of its stages:
+
+    network   waiting for the provider (including retries)
+    decode    MP3 decoding through pydub/ffmpeg and WAV parsing
+    playback  writing audio to the output device
+    write     writing the output file
+
+CPU time far below wall time points at waiting (network, device); CPU close
+to wall time points at work done in this process. Calls are also profiled
+with either a sampling profiler (``mode="sample"``, the default), which writes
+one collapsed-stack file per engine for flamegraph tools, or cProfile
+(``mode="cprofile"``), which writes one pstats file per engine.
+
+Enable it for a block::
+
+    from speech_engine.profiling import profile
+
+    with profile("speech-profile") as session:
+        tts.speak("Hello, world!")
+    print(session.report())
+
+or for the whole process by setting ``SPEECH_ENGINE_PROFILE`` to the output
+directory (and optionally ``SPEECH_ENGINE_PROFILE_MODE``); the reports are
+written at exit. Only the calling thread of each engine call is profiled.
+"""
+
+from __future__ import annotations
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from types import FrameType, TracebackType
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+
+ENV_VAR: str = "SPEECH_ENGINE_PROFILE"
+MODE_ENV_VAR: str = "SPEECH_ENGINE_PROFILE_MODE"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_session: Optional[ProfileSession] = None
+_session_lock = threading.Lock()
+_local = threading.local()
+
+
+class _StageTotals:
+    """Accumulated timings of one (engine, stage) pair."""
+
+    __slots__ = ("calls", "wall", "cpu")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+
+class ProfileSession:
+    """
+    Collects stage timings and profiles while profiling is active.
+
+    Use profile() rather than creating sessions directly.
+
+    Args:
+        output_dir (str): Directory the reports are written to.
+        mode (str): "sample" for the sampling profiler, "cprofile" for
+            cProfile, or "stages" for stage timings only.
+        interval (float): Seconds between samples in "sample" mode.
+    """
+
+    def __init__(
+        self, output_dir: str, mode: str = "sample", interval: float = 0.005
+    ) -> None:
+        if mode not in ("sample", "cprofile", "stages"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.output_dir = output_dir
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, str], _StageTotals] = {}
+        self._samples: Dict[str, Counter[str]] = {}
+        self._stats: Dict[str, pstats.Stats] = {}
+        # Thread ident -> (engine, "TTS_X.method") for calls in progress.
+        self._active: Dict[int, Tuple[str, str]] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the sampler thread, in "sample" mode."""
+        if self.mode == "sample":
+            self._sampler = threading.Thread(
+                target=self._sample, name="speech-engine-profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stops sampling and writes the reports to output_dir."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.write()
+
+    def record(self, engine: str, stage: str, wall: float, cpu: float) -> None:
+        """
+        Adds the timing of one stage.
+
+        Args:
+            engine (str): The engine class name.
+            stage (str): The stage name.
+            wall (float): Elapsed seconds.
+            cpu (float): CPU seconds of the calling thread.
+        """
+        with self._lock:
+            totals = self._stages.get((engine, stage))
+            if totals is None:
+                totals = self._stages[(engine, stage)] = _StageTotals()
+            totals.calls += 1
+            totals.wall += wall
+            totals.cpu += cpu
+
+    @contextmanager
+    def call(self, engine: str, method: str) -> Iterator[None]:
+        """Profiles one engine call on the current thread."""
+        ident = threading.get_ident()
+        profiler: Optional[cProfile.Profile] = None
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another thread's call holds the interpreter-wide profiler.
+                profiler = None
+
+        with self._lock:
+            self._active[ident] = (engine, f"{engine}.{method}")
+        _local.engine = engine
+        try:
+            with _Stage("total"):
+                yield
+        finally:
+            _local.engine = None
+            with self._lock:
+                del self._active[ident]
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    stats = self._stats.get(engine)
+                    if stats is None:
+                        self._stats[engine] = pstats.Stats(profiler)
+                    else:
+                        stats.add(profiler)
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, (engine, root) in active.items():
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = ";".join([root] + _stack(frame))
+                with self._lock:
+                    self._samples.setdefault(engine, Counter())[stack] += 1
+
+    def stage_table(self) -> List[Dict[str, Any]]:
+        """
+        Returns the accumulated stage timings.
+
+        Returns:
+            list: One dict per (engine, stage) with ``engine``, ``stage``,
+            ``calls``, ``wall`` and ``cpu`` (seconds).
+        """
+        with self._lock:
+            return [
+                {
+                    "engine": engine,
+                    "stage": stage,
+                    "calls": totals.calls,
+                    "wall": totals.wall,
+                    "cpu": totals.cpu,
+                }
+                for (engine, stage), totals in sorted(self._stages.items())
+            ]
+
+    def report(self) -> str:
+        """
+        Formats the stage timings as a table.
+
+        Returns:
+            str: The report.
+        """
+        lines = [
+            f"{'engine':<16}{'stage':<10}{'calls':>7}{'wall s':>10}"
+            f"{'cpu s':>10}{'cpu %':>7}"
+        ]
+        for row in self.stage_table():
+            share = 100 * row["cpu"] / row["wall"] if row["wall"] else 0.0
+            lines.append(
+                f"{row['engine']:<16}{row['stage']:<10}{row['calls']:>7}"
+                f"{row['wall']:>10.3f}{row['cpu']:>10.3f}{share:>7.1f}"
+            )
+        return "\n".join(lines)
+
+    def write(self) -> None:
+        """Writes stages.json, report.txt and the per-engine profiles."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, "stages.json"), "w") as f:
+            json.dump(self.stage_table(), f, indent=2)
+        with open(os.path.join(self.output_dir, "report.txt"), "w") as f:
+            f.write(self.report() + "\n")
+
+        with self._lock:
+            samples = {engine: Counter(c) for engine, c in self._samples.items()}
+            stats = dict(self._stats)
+        for engine, counter in samples.items():
+            path = os.path.join(self.output_dir, f"{engine}.collapsed")
+            with open(path, "w") as f:
+                for stack, count in counter.most_common():
+                    f.write(f"{stack} {count}\n")
+        for engine, engine_stats in stats.items():
+            engine_stats.dump_stats(os.path.join(self.output_dir, f"{engine}.pstats"))
+
+
+def _stack(frame: Optional[FrameType]) -> List[str]:
+    """Returns the frames below the engine call as "file:function", outermost first."""
+    names: List[str] = []
+    # Nested engine calls (e.g. save() calling synthesize()) pass through one
+    # wrapper each; cut at the outermost so the public method's frames stay.
+    cut = 0
+    while frame is not None:
+        code = frame.f_code
+        if code is _WRAPPER_CODE:
+            cut = len(names)
+        else:
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    del names[cut:]
+    names.reverse()
+    return names
+
+
+class _Stage:
+    """Times a stage of the current thread's engine call."""
+
+    __slots__ = ("_name", "_wall", "_cpu")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        session = _session
+        engine = getattr(_local, "engine", None)
+        if session is not None and engine is not None:
+            session.record(
+                engine,
+                self._name,
+                time.perf_counter() - self._wall,
+                time.thread_time() - self._cpu,
+            )
+
+
+def stage(name: str) -> ContextManager[None]:
+    """
+    Times a block as a stage of the engine call running on this thread.
+
+    Does nothing unless profiling is active and the thread is inside a
+    profiled engine call.
+
+    Args:
+        name (str): The stage, e.g. "network".
+    """
+    if _session is None or getattr(_local, "engine", None) is None:
+        return nullcontext()
+    return _Stage(name)
+
+
+def profiled(method: F) -> F:
+    """Profiles an engine method while profiling is active."""
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        session = _session
+        if session is None or getattr(_local, "engine", None) is not None:
+            # Not profiling, or nested inside another profiled call.
+            return method(self, *args, **kwargs)
+        with session.call(type(self).__name__, method.__name__):
+            return method(self, *args, **kwargs)
+
+    return cast(F, wrapper)
+
+
+_WRAPPER_CODE = profiled(lambda self: None).__code__
+
+
+@contextmanager
+def profile(
+    output_dir: str = "speech-profile", mode: str = "sample", interval: float = 0.005
+) -> Iterator[ProfileSession]:
+    """
+    Profiles engine calls made, from any thread, while the block runs.
+
+    Args:
+        output_dir (str): Directory the reports are written to on exit.
+        mode (str): "sample", "cprofile" or "stages".
+        interval (float): Seconds between samples in "sample" mode.
+
+    Yields:
+        ProfileSession: The session, e.g. for session.report().
+
+    Raises:
+        RuntimeError: If profiling is already active.
+    """
+    global _session
+    session = ProfileSession(output_dir, mode, interval)
+    with _session_lock:
+        if _session is not None:
+            raise RuntimeError("Profiling is already active")
+        _session = session
+    session.start()
+    try:
+        yield session
+    finally:
+        with _session_lock:
+            _session = None
+        session.stop()
+
+
+def _enable_from_env() -> None:
+    output_dir = os.environ.get(ENV_VAR)
+    if not output_dir:
+        return
+    context = profile(output_dir, os.environ.get(MODE_ENV_VAR, "sample"))
+    context.__enter__()
+    atexit.register(context.__exit__, None, None, None)
+
+
+_enable_from_env()
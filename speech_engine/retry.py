@@ -0,0 +1,94 @@
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from .exceptions import APIError, RateLimitedError, SynthesisCancelledError
+from .timeouts import CancellationToken, Deadline
+
+T = TypeVar("T")
+
+
+class RetryPolicy:
+    """
+    Retries retryable provider errors with exponential backoff and full jitter.
+
+    Only errors whose ``retryable`` flag is set (rate limiting, provider
+    unavailability and timeouts) are retried. For rate limiting the provider's
+    Retry-After is honoured; if it asks to wait longer than ``max_delay`` the
+    error is raised instead.
+
+    Args:
+        max_attempts (int): Total attempts, including the first one.
+        base_delay (float): Backoff ceiling in seconds for the first retry.
+        max_delay (float): Upper bound on any single wait in seconds.
+    """
+
+    def __init__(
+        self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, error: APIError) -> Optional[float]:
+        """
+        Returns how long to wait before retrying, or None to give up.
+
+        Args:
+            attempt (int): The number of the attempt that just failed, from 1.
+            error (APIError): The error it raised.
+
+        Returns:
+            float: Seconds to wait, or None if the error should be raised.
+        """
+        if not error.retryable or attempt >= self.max_attempts:
+            return None
+
+        if isinstance(error, RateLimitedError) and error.retry_after is not None:
+            return error.retry_after if error.retry_after <= self.max_delay else None
+
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def call(
+        self,
+        func: Callable[[], T],
+        deadline: Optional[Deadline] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> T:
+        """
+        Calls func, retrying it according to this policy.
+
+        Args:
+            func (Callable): The operation; must raise APIError on failure.
+            deadline (Deadline, optional): No retry is attempted if its backoff
+                would end after this deadline.
+            cancel (CancellationToken, optional): Interrupts the backoff sleep.
+
+        Returns:
+            The value returned by func.
+
+        Raises:
+            APIError: The last error, once retrying is no longer allowed.
+            SynthesisCancelledError: If cancelled while waiting to retry.
+        """
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except APIError as e:
+                wait = self.delay(attempt, e)
+                remaining = deadline.remaining() if deadline else None
+                if wait is None or (remaining is not None and wait >= remaining):
+                    raise
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                raise SynthesisCancelledError()
+            attempt += 1
+
+
+NO_RETRY: RetryPolicy = RetryPolicy(max_attempts=1)
@@ -0,0 +1,802 @@
+"""
+Long-running HTTP server exposing the speech engines.
+
+Run with ``python -m speech_engine.serve``. Engines are enabled from their API
+key environment variables (TTS_Google needs none); ``--stub`` adds a local
+engine that needs no network access, for testing.
+
+Endpoints:
+    POST /synthesize  JSON body ``{"engine": ..., "text": ..., "voice": ...,
+                      "options": {...}}``, answered with the audio as the
+                      provider produces it (chunked transfer encoding), or
+                      with a Content-Length for a cache hit. ``options``
+                      are passed to the engine's synthesize(), e.g.
+                      ``{"speed": 70}`` for TTS_Witai.
+    GET  /metrics     Prometheus text exposition of the server counters.
+    GET  /healthz     Liveness probe.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import inspect
+import io
+import json
+import math
+import os
+import struct
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    get_args,
+    get_type_hints,
+)
+
+from .exceptions import (
+    APIError,
+    InvalidRequestError,
+    ProviderTimeoutError,
+    RateLimitedError,
+    SynthesisCancelledError,
+)
+from .timeouts import CancellationToken, Timeout
+from .tts_deepgram import TTS_Deepgram
+from .tts_elevenlabs import TTS_ElevenLabs
+from .tts_google import TTS_Google
+from .tts_openai import TTS_Openai
+from .tts_playai import TTS_Playai
+from .tts_witai import TTS_Witai
+
+_MAX_BODY_BYTES: int = 1 << 20
+# How often a running synthesis checks whether its client has gone away.
+_DISCONNECT_POLL_SECONDS: float = 0.1
+# synthesize() arguments that are set by the server, never by a request.
+_SERVER_ARGUMENTS: Tuple[str, ...] = ("self", "text", "timeout", "cancel")
+# Option value types that can be expressed in JSON.
+_OPTION_TYPES: Tuple[type, ...] = (str, bool, int, float)
+_STUB_FRAME_RATE: int = 24000
+# 100 ms of the stub engine's 16-bit mono audio.
+_STUB_CHUNK_BYTES: int = _STUB_FRAME_RATE // 10 * 2
+_REASONS: Dict[int, str] = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class StubEngine:
+    """
+    An offline engine producing a short tone, for testing the server locally.
+
+    Args:
+        latency (float): Seconds to sleep per request, simulating a provider.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._voice: str = "stub"
+        self._latency: float = latency
+
+    def get_voice(self) -> str:
+        """
+        Returns the current voice.
+
+        Returns:
+            str: The current voice.
+        """
+        return self._voice
+
+    def set_voice(self, voice: str) -> None:
+        """
+        Sets the voice to be used for synthesis.
+
+        Args:
+            voice (str): The voice to be set.
+        """
+        self._voice = voice
+
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """Returns a 440 Hz tone lasting 50 ms per character as WAV bytes."""
+        self._wait(cancel)
+        return self._tone(text)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterator[bytes]:
+        """Yields the tone of synthesize() in chunks of 100 ms of audio."""
+        self._wait(cancel)
+        audio = self._tone(text)
+        for start in range(0, len(audio), _STUB_CHUNK_BYTES):
+            if cancel:
+                cancel.raise_if_cancelled()
+            yield audio[start : start + _STUB_CHUNK_BYTES]
+
+    def _wait(self, cancel: Optional[CancellationToken]) -> None:
+        """Sleeps for the simulated latency."""
+        if self._latency:
+            if cancel is None:
+                time.sleep(self._latency)
+            elif cancel.wait(self._latency):
+                raise SynthesisCancelledError()
+
+    @staticmethod
+    def _tone(text: str) -> bytes:
+        frames = _STUB_FRAME_RATE * min(len(text), 200) // 20
+        samples = (
+            int(8000 * math.sin(2 * math.pi * 440 * i / _STUB_FRAME_RATE))
+            for i in range(frames)
+        )
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(_STUB_FRAME_RATE)
+            wav_file.writeframes(struct.pack(f"<{frames}h", *samples))
+        return buffer.getvalue()
+
+
+def _first_chunk(
+    engine: Any, text: str, cancel: CancellationToken, options: Dict[str, Any]
+) -> Tuple[bytes, Optional[Iterator[bytes]]]:
+    """
+    Starts a synthesis and waits for its first chunk of audio.
+
+    Returns:
+        tuple: The first chunk and an iterator over the rest; or the whole
+        audio and None if it is complete already, i.e. a cache hit or an
+        engine without synthesize_stream().
+    """
+    stream = getattr(engine, "synthesize_stream", None)
+    if stream is None:
+        return engine.synthesize(text, cancel=cancel, **options), None
+    chunks = stream(text, cancel=cancel, **options)
+    if isinstance(chunks, tuple):
+        return b"".join(chunks), None
+    rest = iter(chunks)
+    return next(rest, b""), rest
+
+
+@functools.lru_cache(maxsize=None)
+def _option_types(engine_class: type) -> Dict[str, Tuple[type, ...]]:
+    """
+    Returns the options a request may pass to an engine's synthesize().
+
+    These are the keyword parameters of synthesize() that accept a JSON scalar
+    (str, bool, int or float), other than the arguments the server sets itself.
+
+    Args:
+        engine_class (type): The engine class.
+
+    Returns:
+        dict: Option name to the value types it accepts.
+    """
+    method = inspect.unwrap(getattr(engine_class, "synthesize"))
+    hints = get_type_hints(method)
+    allowed: Dict[str, Tuple[type, ...]] = {}
+    for name, parameter in inspect.signature(method).parameters.items():
+        if name in _SERVER_ARGUMENTS or parameter.kind not in (
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            inspect.Parameter.KEYWORD_ONLY,
+        ):
+            continue
+        hint = hints.get(name)
+        types = tuple(t for t in get_args(hint) or (hint,) if t in _OPTION_TYPES)
+        if types:
+            allowed[name] = types
+    return allowed
+
+
+def _check_options(engine_class: type, options: Dict[str, Any]) -> None:
+    """Raises a 400 unless every option is a known option with a valid value."""
+    allowed = _option_types(engine_class)
+    for name, value in options.items():
+        types = allowed.get(name)
+        if types is None:
+            raise _HTTPError(
+                400, f"Unknown option {name!r}; expected one of {sorted(allowed)}"
+            )
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            valid = bool in types
+        elif isinstance(value, int):
+            valid = int in types or float in types
+        else:
+            valid = isinstance(value, types)
+        if not valid:
+            expected = " or ".join(t.__name__ for t in types)
+            raise _HTTPError(400, f"Option {name!r} must be {expected}")
+
+
+class EngineSpec(NamedTuple):
+    """How to build an engine and label its output."""
+
+    factory: Callable[[], Any]
+    content_type: str
+    # The class factory() returns; requests are validated against it before
+    # an instance exists.
+    engine_class: type
+
+
+def default_engines(
+    stub: bool = False, stub_latency: float = 0.0
+) -> Dict[str, EngineSpec]:
+    """
+    Returns the engines that can be built from the current environment.
+
+    Args:
+        stub (bool): Also register the offline ``stub`` engine.
+        stub_latency (float): Simulated per-request latency of the stub engine.
+
+    Returns:
+        dict: Engine name to EngineSpec.
+    """
+    engines: Dict[str, EngineSpec] = {
+        "google": EngineSpec(TTS_Google, "audio/mpeg", TTS_Google),
+    }
+    keyed: List[Tuple[str, str, type, str]] = [
+        ("witai", "WITAI_AUTH_TOKEN", TTS_Witai, "audio/wav"),
+        ("openai", "OPENAI_API_KEY", TTS_Openai, "audio/mpeg"),
+        ("deepgram", "DEEPGRAM_API_KEY", TTS_Deepgram, "audio/wav"),
+        ("elevenlabs", "ELEVENLABS_API_KEY", TTS_ElevenLabs, "audio/mpeg"),
+        ("playai", "GROQ_API_KEY", TTS_Playai, "audio/wav"),
+    ]
+    for name, variable, cls, content_type in keyed:
+        key = os.environ.get(variable)
+        if key:
+            engines[name] = EngineSpec(
+                lambda cls=cls, key=key: cls(key),  # type: ignore[misc]
+                content_type,
+                cls,
+            )
+    if stub:
+        engines["stub"] = EngineSpec(
+            lambda: StubEngine(stub_latency), "audio/wav", StubEngine
+        )
+    return engines
+
+
+class EnginePool:
+    """
+    Instances of one engine, created lazily and shared round-robin.
+
+    Engines are thread-safe and take their options per call, so instances are
+    shared between concurrent requests rather than checked out; more than one
+    instance only spreads load over more HTTP connection pools.
+
+    Args:
+        factory (Callable): Builds a new engine instance.
+        size (int): Maximum number of instances.
+        executor (ThreadPoolExecutor): Runs the blocking engine constructor.
+    """
+
+    def __init__(
+        self, factory: Callable[[], Any], size: int, executor: ThreadPoolExecutor
+    ) -> None:
+        self._factory = factory
+        self._size = size
+        self._executor = executor
+        self._instances: List[Any] = []
+        self._next: int = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Any:
+        """
+        Returns the next instance, creating one while the pool is not full.
+
+        Returns:
+            An engine instance.
+        """
+        if len(self._instances) < self._size:
+            async with self._lock:
+                if len(self._instances) < self._size:
+                    engine = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._factory
+                    )
+                    self._instances.append(engine)
+                    return engine
+        self._next = (self._next + 1) % len(self._instances)
+        return self._instances[self._next]
+
+    @property
+    def created(self) -> int:
+        """Number of instances created so far."""
+        return len(self._instances)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, retry_after: int = 0) -> None:
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class SpeechServer:
+    """
+    Asyncio HTTP server that shares engine instances and queues requests.
+
+    At most ``max_concurrency`` syntheses run at once; up to ``max_queue``
+    further requests wait for a slot and any beyond that are rejected with
+    503 and a Retry-After header.
+
+    Args:
+        engines (dict): Engine name to EngineSpec.
+        pool_size (int): Maximum instances per engine.
+        max_concurrency (int): Maximum simultaneous syntheses.
+        max_queue (int): Maximum requests waiting for a synthesis slot.
+    """
+
+    def __init__(
+        self,
+        engines: Dict[str, EngineSpec],
+        pool_size: int = 1,
+        max_concurrency: int = 8,
+        max_queue: int = 64,
+    ) -> None:
+        self._engines = engines
+        self._pool_size = pool_size
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="speech-engine"
+        )
+        self._pools: Dict[str, EnginePool] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting: int = 0
+        self._in_flight: int = 0
+        self._requests: Dict[Tuple[str, int], int] = {}
+        self._rejected: int = 0
+        self._latency_sum: Dict[str, float] = {}
+        self._latency_count: Dict[str, int] = {}
+        self._audio_bytes: Dict[str, int] = {}
+        self._stream_errors: Dict[str, int] = {}
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        """
+        Starts listening; must be called from within the event loop.
+
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind, 0 for any free port.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        self._pools = {
+            name: EnginePool(spec.factory, self._pool_size, self._executor)
+            for name, spec in self._engines.items()
+        }
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def close(self) -> None:
+        """Stops the worker threads once the running syntheses finish."""
+        self._executor.shutdown(wait=False)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._dispatch(method, path, body, reader, writer, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            await self._send_error(writer, _HTTPError(400, "Malformed request line"))
+            return None
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        content_length = headers.get("content-length") or "0"
+        if not (content_length.isascii() and content_length.isdigit()):
+            await self._send_error(writer, _HTTPError(400, "Invalid Content-Length"))
+            return None
+        length = int(content_length)
+        if length > _MAX_BODY_BYTES:
+            await self._send_error(writer, _HTTPError(413, "Request body too large"))
+            return None
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _dispatch(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        keep_alive: bool,
+    ) -> None:
+        try:
+            if path == "/synthesize":
+                if method != "POST":
+                    raise _HTTPError(405, "Use POST")
+                await self._synthesize(body, reader, writer, keep_alive)
+            elif path == "/metrics":
+                await self._send(
+                    writer,
+                    200,
+                    self.metrics().encode(),
+                    "text/plain; version=0.0.4",
+                    keep_alive,
+                )
+            elif path == "/healthz":
+                await self._send(writer, 200, b"ok\n", "text/plain", keep_alive)
+            else:
+                raise _HTTPError(404, f"No route for {path}")
+        except _HTTPError as e:
+            await self._send_error(writer, e, keep_alive)
+
+    async def _synthesize(
+        self,
+        body: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        keep_alive: bool,
+    ) -> None:
+        try:
+            payload: Dict[str, Any] = json.loads(body or b"{}")
+            name: str = payload["engine"]
+            text: str = payload["text"]
+            options: Any = payload.get("options") or {}
+        except (ValueError, KeyError, TypeError):
+            raise _HTTPError(
+                400, "Body must be JSON with 'engine' and 'text'"
+            ) from None
+        if not isinstance(name, str):
+            raise _HTTPError(400, "'engine' must be a string")
+        if not isinstance(text, str) or not text:
+            raise _HTTPError(400, "'text' must be a non-empty string")
+        if not isinstance(options, dict):
+            raise _HTTPError(400, "'options' must be an object")
+        options = dict(options)
+        if payload.get("voice"):
+            options["voice"] = payload["voice"]
+
+        pool = self._pools.get(name)
+        if pool is None:
+            raise _HTTPError(404, f"Unknown engine: {name}")
+        try:
+            _check_options(self._engines[name].engine_class, options)
+        except _HTTPError as e:
+            self._count(name, e.status)
+            raise
+
+        assert self._slots is not None
+        # Only requests that have to wait for a slot count against the queue.
+        if self._slots.locked() and self._waiting >= self._max_queue:
+            self._rejected += 1
+            self._count(name, 503)
+            raise _HTTPError(503, "Server busy", retry_after=1)
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        spec = self._engines[name]
+        self._in_flight += 1
+        started = time.perf_counter()
+        cancel = CancellationToken()
+        watcher = asyncio.ensure_future(self._watch_disconnect(reader, cancel))
+        try:
+            try:
+                engine = await pool.get()
+                audio, rest = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    partial(_first_chunk, engine, text, cancel, options),
+                )
+            except Exception as e:
+                raise self._synthesis_error(name, e, cancel) from e
+            if rest is not None:
+                size = await self._send_stream(
+                    writer, audio, rest, name, cancel, spec.content_type, keep_alive
+                )
+        finally:
+            watcher.cancel()
+            self._in_flight -= 1
+            self._slots.release()
+
+        if rest is None:
+            size = len(audio)
+            self._count(name, 200)
+        elapsed = time.perf_counter() - started
+        self._latency_sum[name] = self._latency_sum.get(name, 0.0) + elapsed
+        self._latency_count[name] = self._latency_count.get(name, 0) + 1
+        self._audio_bytes[name] = self._audio_bytes.get(name, 0) + size
+
+        if rest is None:
+            # Complete already (a cache hit, or an engine that cannot stream),
+            # so it is sent in one piece with its length.
+            await self._send(writer, 200, audio, spec.content_type, keep_alive)
+
+    def _synthesis_error(
+        self, name: str, error: Exception, cancel: CancellationToken
+    ) -> Exception:
+        """Counts a synthesis that failed before any audio was sent."""
+        if isinstance(error, SynthesisCancelledError) and cancel.cancelled:
+            self._count(name, 499)
+            return ConnectionResetError("Client disconnected")
+        if isinstance(error, APIError):
+            status, retry_after = self._status_for(error)
+            self._count(name, status)
+            return _HTTPError(status, error.message, retry_after)
+        self._count(name, 502)
+        return _HTTPError(502, str(error))
+
+    async def _send_stream(
+        self,
+        writer: asyncio.StreamWriter,
+        first: bytes,
+        rest: Iterator[bytes],
+        name: str,
+        cancel: CancellationToken,
+        content_type: str,
+        keep_alive: bool,
+    ) -> int:
+        """
+        Sends audio with chunked transfer encoding as the engine produces it.
+
+        The status line is already out when a later chunk fails, so the
+        connection is closed without the final empty chunk, which clients
+        report as an incomplete response.
+
+        Returns:
+            int: Bytes of audio sent.
+        """
+        loop = asyncio.get_running_loop()
+        writer.write(
+            self._head(200, content_type, keep_alive)
+            + b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        self._count(name, 200)
+        size = 0
+        chunk = first
+        try:
+            while chunk:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                size += len(chunk)
+                await writer.drain()
+                chunk = await loop.run_in_executor(self._executor, next, rest, b"")
+        except (ConnectionError, asyncio.CancelledError):
+            # Stop the provider's response too rather than leave it open.
+            cancel.cancel()
+            raise
+        except Exception as e:
+            if not cancel.cancelled:
+                self._stream_errors[name] = self._stream_errors.get(name, 0) + 1
+            raise ConnectionAbortedError(f"Synthesis failed mid-stream: {e}") from e
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return size
+
+    @staticmethod
+    async def _watch_disconnect(
+        reader: asyncio.StreamReader, cancel: CancellationToken
+    ) -> None:
+        """
+        Cancels a synthesis once its client has closed the connection.
+
+        asyncio does not cancel a connection handler when the peer goes away;
+        the end of the stream only shows on the reader, which is idle while a
+        request is being synthesized.
+        """
+        while not reader.at_eof():
+            await asyncio.sleep(_DISCONNECT_POLL_SECONDS)
+        cancel.cancel()
+
+    @staticmethod
+    def _status_for(error: APIError) -> Tuple[int, int]:
+        """Maps a provider error to the status and Retry-After to answer with."""
+        if isinstance(error, RateLimitedError):
+            return 429, math.ceil(error.retry_after or 1)
+        if isinstance(error, InvalidRequestError):
+            return 400, 0
+        if isinstance(error, ProviderTimeoutError):
+            return 504, 0
+        return 502, 0
+
+    def _count(self, engine: str, status: int) -> None:
+        key = (engine, status)
+        self._requests[key] = self._requests.get(key, 0) + 1
+
+    def metrics(self) -> str:
+        """
+        Renders the server counters in Prometheus text format.
+
+        Returns:
+            str: The metrics exposition.
+        """
+        lines = [
+            "# TYPE speech_engine_requests_total counter",
+            *(
+                f'speech_engine_requests_total{{engine="{engine}",status="{status}"}}'
+                f" {count}"
+                for (engine, status), count in sorted(self._requests.items())
+            ),
+            "# TYPE speech_engine_synthesis_seconds summary",
+            *(
+                f'speech_engine_synthesis_seconds_sum{{engine="{engine}"}} {total}'
+                for engine, total in sorted(self._latency_sum.items())
+            ),
+            *(
+                f'speech_engine_synthesis_seconds_count{{engine="{engine}"}} {count}'
+                for engine, count in sorted(self._latency_count.items())
+            ),
+            "# TYPE speech_engine_audio_bytes_total counter",
+            *(
+                f'speech_engine_audio_bytes_total{{engine="{engine}"}} {total}'
+                for engine, total in sorted(self._audio_bytes.items())
+            ),
+            "# TYPE speech_engine_stream_errors_total counter",
+            *(
+                f'speech_engine_stream_errors_total{{engine="{engine}"}} {total}'
+                for engine, total in sorted(self._stream_errors.items())
+            ),
+            "# TYPE speech_engine_rejected_total counter",
+            f"speech_engine_rejected_total {self._rejected}",
+            "# TYPE speech_engine_queue_depth gauge",
+            f"speech_engine_queue_depth {self._waiting}",
+            "# TYPE speech_engine_in_flight gauge",
+            f"speech_engine_in_flight {self._in_flight}",
+            "# TYPE speech_engine_pool_instances gauge",
+            *(
+                f'speech_engine_pool_instances{{engine="{name}"}} {pool.created}'
+                for name, pool in sorted(self._pools.items())
+            ),
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _head(
+        status: int, content_type: str, keep_alive: bool, retry_after: int = 0
+    ) -> bytes:
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if retry_after:
+            head += f"Retry-After: {retry_after}\r\n"
+        return head.encode("latin-1")
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+        keep_alive: bool,
+        retry_after: int = 0,
+    ) -> None:
+        writer.write(
+            self._head(status, content_type, keep_alive, retry_after)
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def _send_error(
+        self, writer: asyncio.StreamWriter, error: _HTTPError, keep_alive: bool = False
+    ) -> None:
+        body = json.dumps({"error": error.message}).encode() + b"\n"
+        await self._send(
+            writer,
+            error.status,
+            body,
+            "application/json",
+            keep_alive,
+            error.retry_after,
+        )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    engines = default_engines(stub=args.stub, stub_latency=args.stub_latency)
+    if args.engines:
+        engines = {name: engines[name] for name in args.engines if name in engines}
+    server = SpeechServer(
+        engines,
+        pool_size=args.pool_size,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+    )
+    listener = await server.start(args.host, args.port)
+    print(
+        f"Serving {', '.join(sorted(engines))} on http://{args.host}:{args.port}",
+        flush=True,
+    )
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point for ``python -m speech_engine.serve``.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of sys.argv.
+    """
+    parser = argparse.ArgumentParser(description="Serve speech_engine over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument(
+        "--engines", nargs="*", help="Only serve these engines (default: all)"
+    )
+    parser.add_argument(
+        "--stub", action="store_true", help="Add the offline 'stub' engine"
+    )
+    parser.add_argument(
+        "--stub-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the stub engine sleeps per request",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
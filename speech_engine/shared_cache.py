@@ -0,0 +1,384 @@
+"""
+Synthesis cache shared by every process on a host, in a memory-mapped file.
+
+All processes (e.g. gunicorn workers) that open the same path map the same
+file, so a prompt synthesized by one worker is a hit in all the others, and
+concurrent misses on the same prompt are synthesized only once. No external
+service is involved.
+
+File layout::
+
+    header   magic, version, slot count, data size, write head
+    index    open-addressed slots: (render key, position, length)
+    data     ring buffer of records: (render key, length, BLAKE2b digest, audio)
+
+The write head only grows; a record written at position ``p`` lives at
+``p % data_size`` and is valid while ``p >= head - data_size``, i.e. until the
+ring wraps over it. Every record repeats its key and carries a digest of its
+audio, so a record that was overwritten or torn by a crashed writer is seen as
+a miss rather than returned.
+
+Readers take a shared ``flock`` on the file, writers an exclusive one, and a
+thread lock serializes threads of the same process. Requires a POSIX system.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if sys.platform != "win32":
+    import fcntl
+
+_MAGIC = b"SPEECHC1"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")  # magic, version, slots, data_size, head
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<32sQI4x")  # key, position, record length
+_RECORD = struct.Struct("<32sI16s")  # key, audio length, audio digest
+_EMPTY_KEY = bytes(32)
+_PAGE = mmap.PAGESIZE
+
+# Slots examined per lookup before a key is considered absent.
+_PROBES: int = 16
+# Striped locks used to synthesize each missing key only once.
+_STRIPES: int = 256
+
+
+def _digest(audio: bytes) -> bytes:
+    return hashlib.blake2b(audio, digest_size=16).digest()
+
+
+class SharedCache:
+    """
+    A cross-process cache of synthesized audio, keyed by render_key().
+
+    Pass it to an engine constructor (``cache=``) to cache that engine's
+    synthesis results; several engines and processes can share one file.
+
+    Args:
+        path (str): The cache file; created if missing.
+        size (int): Bytes of audio kept before the oldest records are
+            overwritten. Only used when the file is created.
+        slots (int): Number of index slots; bounds the number of entries.
+            Only used when the file is created.
+    """
+
+    def __init__(
+        self, path: str, size: int = 256 * 1024 * 1024, slots: int = 65536
+    ) -> None:
+        if sys.platform == "win32":
+            raise OSError("SharedCache requires a POSIX system")
+        if slots < _PROBES:
+            raise ValueError(f"slots must be at least {_PROBES}")
+
+        self.path: str = os.path.abspath(path)
+        self._size = size
+        self._slots = slots
+        self._lock = threading.Lock()
+        self._stripes: List[threading.Lock] = [
+            threading.Lock() for _ in range(_STRIPES)
+        ]
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._pid = -1
+        self._open()
+
+    def _open(self) -> None:
+        """Opens and maps the file, initializing it if it is new."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _HEADER.size, 0)
+                if len(header) == _HEADER.size and header[:8] == _MAGIC:
+                    _, version, slots, data_size, _ = _HEADER.unpack(header)
+                    if version != _VERSION:
+                        raise OSError(f"{self.path} has cache version {version}")
+                else:
+                    slots, data_size = self._slots, self._size
+                    total = self._data_offset(slots) + data_size
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, total)
+                    os.pwrite(
+                        fd, _HEADER.pack(_MAGIC, _VERSION, slots, data_size, 0), 0
+                    )
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+            self._n_slots: int = slots
+            self._data_size: int = data_size
+            self._data_start: int = self._data_offset(slots)
+            self._map = mmap.mmap(fd, self._data_start + data_size)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._fd = fd
+        self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+
+    @staticmethod
+    def _data_offset(slots: int) -> int:
+        index_end = _HEADER_SIZE + slots * _SLOT.size
+        return -(-index_end // _PAGE) * _PAGE
+
+    def _check_fork(self) -> None:
+        # A forked child shares the parent's open file description, and with
+        # it the parent's flock; reopen so the locks exclude between them.
+        if os.getpid() != self._pid:
+            self._lock = threading.Lock()
+            self._stripes = [threading.Lock() for _ in range(_STRIPES)]
+            self._map.close()
+            os.close(self._fd)
+            os.close(self._lock_fd)
+            self._open()
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        with self._lock:
+            fcntl.flock(self._fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _head(self) -> int:
+        head: int = _HEADER.unpack_from(self._map, 0)[4]
+        return head
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER_SIZE + index * _SLOT.size
+
+    def _probe(self, key: bytes) -> Iterator[Tuple[int, bytes, int, int]]:
+        """Yields (slot offset, key, position, length) for the key's slots."""
+        start = int.from_bytes(key[:8], "little") % self._n_slots
+        for i in range(_PROBES):
+            offset = self._slot_offset((start + i) % self._n_slots)
+            slot_key, position, length = _SLOT.unpack_from(self._map, offset)
+            yield offset, slot_key, position, length
+
+    def _read(
+        self, key: bytes, position: int, length: int, head: int
+    ) -> Optional[bytes]:
+        """Returns the audio of a record if it is still intact."""
+        if position < head - self._data_size or position + length > head:
+            return None
+        offset = self._data_start + position % self._data_size
+        record_key, audio_length, digest = _RECORD.unpack_from(self._map, offset)
+        if record_key != key or _RECORD.size + audio_length != length:
+            return None
+        start = offset + _RECORD.size
+        audio = self._map[start : start + audio_length]
+        return audio if _digest(audio) == digest else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the cached audio for a render key.
+
+        Args:
+            key (str): The render key, from render_key().
+
+        Returns:
+            bytes: The audio, or None on a miss.
+        """
+        self._check_fork()
+        raw = bytes.fromhex(key)
+        audio = None
+        with self._locked(fcntl.LOCK_SH):
+            head = self._head()
+            for _, slot_key, position, length in self._probe(raw):
+                if slot_key == raw:
+                    audio = self._read(raw, position, length, head)
+                    break
+        with self._lock:
+            if audio is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes) -> bool:
+        """
+        Caches audio under a render key, overwriting the oldest records if the
+        ring is full.
+
+        Args:
+            key (str): The render key, from render_key().
+            audio (bytes): The audio.
+
+        Returns:
+            bool: False if the audio is larger than the cache.
+        """
+        length = _RECORD.size + len(audio)
+        if length > self._data_size:
+            return False
+
+        self._check_fork()
+        raw = bytes.fromhex(key)
+        with self._locked(fcntl.LOCK_EX):
+            position = self._head()
+            offset = position % self._data_size
+            if offset + length > self._data_size:
+                # Records never wrap; start the next lap of the ring instead.
+                position += self._data_size - offset
+                offset = 0
+
+            start = self._data_start + offset
+            _RECORD.pack_into(self._map, start, raw, len(audio), _digest(audio))
+            self._map[start + _RECORD.size : start + length] = audio
+            head = position + length
+            struct.pack_into("<Q", self._map, _HEADER.size - 8, head)
+
+            # Reuse the key's slot, else a free or stale one, else evict the
+            # oldest entry among the probed slots.
+            target = None
+            oldest = None
+            for slot_offset, slot_key, slot_position, _ in self._probe(raw):
+                if slot_key == raw:
+                    target = slot_offset
+                    break
+                if target is None and (
+                    slot_key == _EMPTY_KEY or slot_position < head - self._data_size
+                ):
+                    target = slot_offset
+                if oldest is None or slot_position < oldest[1]:
+                    oldest = (slot_offset, slot_position)
+            if target is None:
+                assert oldest is not None
+                target = oldest[0]
+            _SLOT.pack_into(self._map, target, raw, position, length)
+
+        with self._lock:
+            self._stores += 1
+        return True
+
+    @contextmanager
+    def _single_flight(self, key: str) -> Iterator[None]:
+        """Holds a per-key (striped) lock across threads and processes."""
+        stripe = int(key[:8], 16) % _STRIPES
+        with self._stripes[stripe]:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+    def get_or_synthesize(self, key: str, synthesize: Callable[[], bytes]) -> bytes:
+        """
+        Returns the cached audio for a key, synthesizing and caching it on a miss.
+
+        Concurrent misses on the same key, in any process, wait for the first
+        one instead of synthesizing the same audio again.
+
+        Args:
+            key (str): The render key, from render_key().
+            synthesize (Callable): Returns the audio on a miss.
+
+        Returns:
+            bytes: The audio.
+        """
+        audio = self.get(key)
+        if audio is not None:
+            return audio
+
+        self._check_fork()
+        with self._single_flight(key):
+            audio = self.get(key)
+            if audio is None:
+                audio = synthesize()
+                self.put(key, audio)
+        return audio
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns this process's counters and the size of the shared cache.
+
+        Returns:
+            dict: ``hits``, ``misses`` and ``stores`` in this process; ``size``,
+            the bytes of audio the cache holds; ``written``, the total bytes
+            written to it by all processes.
+        """
+        self._check_fork()
+        with self._locked(fcntl.LOCK_SH):
+            written = self._head()
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "size": self._data_size,
+                "written": written,
+            }
+
+    def close(self) -> None:
+        """Unmaps and closes the cache file."""
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
+            os.close(self._lock_fd)
+
+
+def cached(
+    cache: Optional[SharedCache], key: str, synthesize: Callable[[], bytes]
+) -> bytes:
+    """
+    Calls synthesize through cache, or directly if there is no cache.
+
+    Args:
+        cache (SharedCache, optional): The engine's cache.
+        key (str): The render key, from render_key().
+        synthesize (Callable): Returns the audio.
+
+    Returns:
+        bytes: The audio.
+    """
+    if cache is None:
+        return synthesize()
+    return cache.get_or_synthesize(key, synthesize)
+
+
+def cached_stream(
+    cache: Optional[SharedCache], key: str, stream: Callable[[], Iterable[bytes]]
+) -> Iterable[bytes]:
+    """
+    Calls stream through cache, or directly if there is no cache.
+
+    A hit is returned whole, as a one-element tuple, so a caller can send it
+    with its length. A miss is passed on chunk by chunk as it arrives and is
+    stored once complete. Unlike cached(), concurrent misses on the same key
+    each synthesize: holding the key's lock while one caller consumes the
+    stream would stall the others for as long as that caller reads.
+
+    Args:
+        cache (SharedCache, optional): The engine's cache.
+        key (str): The render key, from render_key().
+        stream (Callable): Returns the audio in chunks.
+
+    Returns:
+        Iterable[bytes]: The audio.
+    """
+    if cache is None:
+        return stream()
+    audio = cache.get(key)
+    if audio is not None:
+        return (audio,)
+    return _store_stream(cache, key, stream())
+
+
+def _store_stream(
+    cache: SharedCache, key: str, chunks: Iterable[bytes]
+) -> Iterator[bytes]:
+    """Passes chunks on, storing the audio once the stream has been read to the end."""
+    received: List[bytes] = []
+    for chunk in chunks:
+        received.append(chunk)
+        yield chunk
+    cache.put(key, b"".join(received))
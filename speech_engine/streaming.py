@@ -0,0 +1,142 @@
+import queue
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .audioPlayer import AudioPlayer
+from .exceptions import SynthesisCancelledError
+from .timeouts import CancellationToken
+
+# Sentence punctuation (optionally followed by closing quotes/brackets) and then
+# whitespace, so "3.14" or "e.g.," mid-token never count as a boundary.
+_SENTENCE_END = re.compile(r"[.!?;:…]+[\"')\]”’]*\s|\n")
+_CLAUSE_END = re.compile(r"[,–—]\s")
+
+PCMAudio = Tuple[bytes, int, int, int]
+
+
+def _find_boundary(buffer: str, min_chars: int, max_chars: int) -> Optional[int]:
+    """Returns the index just past the next phrase boundary, if there is one."""
+    for match in _SENTENCE_END.finditer(buffer):
+        if match.end() >= min_chars:
+            return match.end()
+
+    # Fall back to clause boundaries for long sentences, then to a word break.
+    if len(buffer) >= max_chars // 2:
+        for match in _CLAUSE_END.finditer(buffer):
+            if match.end() >= max_chars // 2:
+                return match.end()
+    if len(buffer) >= max_chars:
+        space = buffer.rfind(" ", min_chars, max_chars)
+        return space + 1 if space > 0 else max_chars
+    return None
+
+
+def split_phrases(
+    fragments: Iterable[str], min_chars: int = 20, max_chars: int = 200
+) -> Iterator[str]:
+    """
+    Groups streamed text fragments (e.g. LLM tokens) into speakable phrases.
+
+    A phrase ends at sentence punctuation once it is at least ``min_chars``
+    long, at a comma or dash once it is half of ``max_chars``, and otherwise is
+    cut at the last word break before ``max_chars``.
+
+    Args:
+        fragments (Iterable[str]): Text fragments in order.
+        min_chars (int): Minimum phrase length before a sentence boundary counts.
+        max_chars (int): Maximum phrase length.
+
+    Yields:
+        str: Each complete phrase, as soon as it is complete.
+    """
+    buffer = ""
+    for fragment in fragments:
+        buffer += fragment
+        cut = _find_boundary(buffer, min_chars, max_chars)
+        while cut is not None:
+            phrase, buffer = buffer[:cut].strip(), buffer[cut:].lstrip()
+            if phrase:
+                yield phrase
+            cut = _find_boundary(buffer, min_chars, max_chars)
+
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def stream_speech(
+    synthesize: Callable[[str], PCMAudio],
+    player: AudioPlayer,
+    fragments: Iterable[str],
+    max_pending: int = 3,
+    cancel: Optional[CancellationToken] = None,
+) -> None:
+    """
+    Synthesizes phrases as they complete and plays them back in order.
+
+    Phrases are synthesized on a worker thread while earlier phrases play, so
+    playback can start before the whole text has been generated. Phrases are
+    played as one continuous stream through a jitter buffer, which inserts
+    silence rather than stalling when synthesis falls behind playback.
+
+    Args:
+        synthesize (Callable): Returns (raw_audio, channels, sample_width,
+            frame_rate) for a phrase.
+        player (AudioPlayer): The player used for playback.
+        fragments (Iterable[str]): Text fragments in order.
+        max_pending (int): Maximum phrases synthesized ahead of the playback
+            buffer.
+        cancel (CancellationToken, optional): Stops reading fragments and
+            playback when cancelled.
+
+    Raises:
+        Exception: The first error raised while synthesizing or playing.
+        SynthesisCancelledError: If cancel is cancelled.
+    """
+    pending: "queue.Queue[Optional[Future[PCMAudio]]]" = queue.Queue(max_pending)
+    errors: List[BaseException] = []
+
+    finished = threading.Event()
+
+    def results() -> Iterator[PCMAudio]:
+        while True:
+            future = pending.get()
+            if future is None:
+                finished.set()
+                return
+            yield future.result()
+
+    def playback() -> None:
+        try:
+            player.play_stream(results(), cancel=cancel)
+        except BaseException as e:
+            errors.append(e)
+            # Keep draining so the producer never blocks on a full queue, unless
+            # the failure came after the last phrase (e.g. while the buffered
+            # audio played out), when nothing more will be queued.
+            while not finished.is_set():
+                future = pending.get()
+                if future is None:
+                    finished.set()
+                else:
+                    future.cancel()
+
+    thread = threading.Thread(target=playback, name="speech-engine-playback")
+    thread.start()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        for phrase in split_phrases(fragments):
+            if errors or (cancel and cancel.cancelled):
+                break
+            pending.put(executor.submit(synthesize, phrase))
+    finally:
+        pending.put(None)
+        thread.join()
+        executor.shutdown()
+
+    if errors:
+        raise errors[0]
+    if cancel:
+        cancel.raise_if_cancelled()
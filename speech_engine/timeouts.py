@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .exceptions import ProviderTimeoutError, SynthesisCancelledError
+
+
+class Timeout:
+    """
+    Time limits for provider calls.
+
+    Args:
+        connect (float): Seconds to wait for a connection to the provider.
+        read (float): Seconds to wait between bytes of the response.
+        total (float, optional): Deadline in seconds for a whole synthesis,
+            including retries and backoff. None means no deadline.
+    """
+
+    def __init__(
+        self, connect: float = 10.0, read: float = 60.0, total: Optional[float] = None
+    ) -> None:
+        self.connect = connect
+        self.read = read
+        self.total = total
+
+    def as_tuple(self) -> Tuple[float, float]:
+        """
+        Returns the (connect, read) pair accepted by requests.
+
+        Returns:
+            tuple: The connect and read timeouts.
+        """
+        return self.connect, self.read
+
+    def __repr__(self) -> str:
+        return f"Timeout(connect={self.connect}, read={self.read}, total={self.total})"
+
+
+class Deadline:
+    """
+    Tracks the time left for a synthesis started now.
+
+    Args:
+        seconds (float, optional): Time allowed, or None for no deadline.
+    """
+
+    def __init__(self, seconds: Optional[float]) -> None:
+        self._expires: Optional[float] = (
+            None if seconds is None else time.monotonic() + seconds
+        )
+
+    def remaining(self) -> Optional[float]:
+        """
+        Returns the seconds left, or None if there is no deadline.
+
+        Returns:
+            float: Seconds left, never negative.
+        """
+        if self._expires is None:
+            return None
+        return max(0.0, self._expires - time.monotonic())
+
+    def clamp(self, seconds: float) -> float:
+        """
+        Shortens a per-request timeout so it ends no later than the deadline.
+
+        Args:
+            seconds (float): The timeout to clamp.
+
+        Returns:
+            float: The clamped timeout.
+        """
+        remaining = self.remaining()
+        return seconds if remaining is None else max(0.001, min(seconds, remaining))
+
+    def check(self) -> None:
+        """
+        Raises:
+            ProviderTimeoutError: If the deadline has passed.
+        """
+        if self.remaining() == 0.0:
+            raise ProviderTimeoutError("Synthesis deadline exceeded")
+
+
+class CancellationToken:
+    """
+    Cooperatively cancels a synthesis from another thread or asyncio task.
+
+    Pass the token to synthesize(), speak(), save() or speak_stream() and call
+    cancel() to stop it. Open provider connections are closed immediately;
+    the call then raises SynthesisCancelledError. A token stays cancelled, so
+    use a new one per operation.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def cancel(self) -> None:
+        """Requests cancellation of every operation using this token."""
+        with self._lock:
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called."""
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleeps until the timeout passes or the token is cancelled.
+
+        Args:
+            timeout (float): Seconds to sleep.
+
+        Returns:
+            bool: True if the token was cancelled.
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            SynthesisCancelledError: If the token has been cancelled.
+        """
+        if self._event.is_set():
+            raise SynthesisCancelledError()
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """
+        Runs callback if the token is cancelled while the block executes.
+
+        Args:
+            callback (Callable): Usually closes an open connection.
+        """
+        with self._lock:
+            registered = not self._event.is_set()
+            if registered:
+                self._callbacks.append(callback)
+        if not registered:
+            callback()
+        try:
+            yield
+        finally:
+            if registered:
+                with self._lock:
+                    self._callbacks.remove(callback)
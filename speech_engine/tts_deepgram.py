@@ -1,28 +1,56 @@
 import io
 import wave
-from typing import Any
+from functools import partial
+from typing import Any, Iterable, Optional
 
 import requests
 
+from ._http import fetch, fetch_stream, new_session
+from .audio_store import AudioStore, render_key, write_file
 from .audioPlayer import AudioPlayer
 from .exceptions import FileExtensionError, InvalidTokenError
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Timeout
 
 
 class TTS_Deepgram:
     """
     The TTS_Deepgram class provides functionality to synthesize text into speech using the Deepgram
 
+    Instances are thread-safe. The voice can be passed per call, so a single
+    instance and its pooled HTTP session can serve concurrent requests;
+    set_voice() only changes the default for calls that do not pass one.
+
     Args:
         apiKey (str): The Open AI API Key.
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
 
     """
 
-    def __init__(self, apiKey: str) -> None:
+    def __init__(
+        self,
+        apiKey: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
         if not apiKey:
             raise ValueError("API key cannot be empty")
 
         self._voice: str = "aura-asteria-en"
         self._apiKey: str = apiKey
+        self._session: requests.Session = new_session()
+        self._retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self._timeout: Timeout = timeout or Timeout()
+        self._cache: Optional[SharedCache] = cache
         if not self._validate_token():
             raise InvalidTokenError()
         self._player: AudioPlayer = AudioPlayer()
@@ -38,8 +66,10 @@ class TTS_Deepgram:
             "Authorization": f"Bearer {self._apiKey}",
         }
         return (
-            requests.get(
-                "https://api.deepgram.com/v1/models", headers=headers
+            self._session.get(
+                "https://api.deepgram.com/v1/models",
+                headers=headers,
+                timeout=self._timeout.as_tuple(),
             ).status_code
             == 200
         )
@@ -62,11 +92,88 @@ class TTS_Deepgram:
         """
         self._voice = voice
 
-    def _synthesize_speech(self, text: str) -> bytes:
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes the given text into speech and returns the WAV audio.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            bytes: The WAV audio.
+
+        Raises:
+            APIError: If the request fails after any retries.
+        """
+        return self._synthesize_speech(text, voice, timeout, cancel)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes the given text into speech, returning the WAV audio as it arrives.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: Chunks of the WAV audio, produced as Deepgram sends
+            them. A cached result is returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If the request fails after any retries. Once audio has
+                arrived it is raised from the iteration, without retrying.
+        """
+        return cached_stream(
+            self._cache,
+            render_key("deepgram", voice or self._voice, {}, text),
+            partial(fetch_stream, **self._request(text, voice, timeout, cancel)),
+        )
+
+    def _synthesize_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
         """Fetch TTS audio bytes from the Deepgram API."""
+        return cached(
+            self._cache,
+            render_key("deepgram", voice or self._voice, {}, text),
+            partial(fetch, **self._request(text, voice, timeout, cancel)),
+        )
+
+    def _request(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> dict[str, Any]:
+        """Returns the fetch() arguments of a Deepgram synthesis request."""
         DEEPGRAM_URL: str = (
             "https://api.deepgram.com/v1/speak"
-            f"?model={self._voice}"
+            f"?model={voice or self._voice}"
             "&encoding=linear16"
             "&sample_rate=24000"
         )
@@ -76,22 +183,39 @@ class TTS_Deepgram:
         }
         payload: dict[str, str] = {"text": text}
 
-        resp: requests.Response = requests.post(
-            DEEPGRAM_URL, headers=headers, json=payload, stream=True
-        )
-
-        if resp.status_code != 200:
-            raise Exception(f"API Error: {resp.status_code} - {resp.text}")
-
-        return resp.content
+        return {
+            "session": self._session,
+            "method": "POST",
+            "url": DEEPGRAM_URL,
+            "retry_policy": self._retry_policy,
+            "timeout": timeout or self._timeout,
+            "cancel": cancel,
+            "headers": headers,
+            "json": payload,
+        }
 
-    def save(self, text: str, filename: str = "output.wav") -> None:
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.wav",
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and saves it as an audio file.
 
         Args:
             text (str): The text to be synthesized into speech.
             filename (str): The filename to save the audio file (must have a .wav extension).
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: If the filename doesn't have a .wav extension.
@@ -99,25 +223,89 @@ class TTS_Deepgram:
         if not filename.endswith(".wav"):
             raise FileExtensionError(message="Output file type should be .wav")
 
-        with open(filename, "wb") as f:
-            f.write(self._synthesize_speech(text))
+        if store is not None:
+            store.save(
+                filename,
+                "deepgram",
+                voice or self._voice,
+                {},
+                text,
+                partial(self._synthesize_speech, text, voice, timeout, cancel),
+            )
+            return
 
-    def speak(self, text: str) -> None:
+        audio: bytes = self._synthesize_speech(text, voice, timeout, cancel)
+        with stage("write"):
+            write_file(filename, audio)
+
+    @profiled
+    def speak(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and plays it.
 
         Args:
             text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        self._player.play_bytes(
+            *self._synthesize_pcm(text, voice, timeout, cancel), cancel=cancel
+        )
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
+
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
+
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
         """
-        audio: io.BytesIO = io.BytesIO(self._synthesize_speech(text))
+        stream_speech(
+            partial(self._synthesize_pcm, voice=voice, timeout=timeout, cancel=cancel),
+            self._player,
+            fragments,
+            cancel=cancel,
+        )
 
-        with wave.open(audio, "rb") as wav_file:
+    def _synthesize_pcm(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> tuple[bytes, int, int, int]:
+        """Synthesizes text and decodes the WAV response into raw PCM."""
+        audio: io.BytesIO = io.BytesIO(
+            self._synthesize_speech(text, voice, timeout, cancel)
+        )
+
+        with stage("decode"), wave.open(audio, "rb") as wav_file:
             channels: int = wav_file.getnchannels()
             sample_width: int = wav_file.getsampwidth()
             frame_rate: int = wav_file.getframerate()
             raw_audio: bytes = wav_file.readframes(wav_file.getnframes())
 
-        self._player.play_bytes(raw_audio, channels, sample_width, frame_rate)
+        return raw_audio, channels, sample_width, frame_rate
 
     def get_voices(self) -> list[str]:
         """
@@ -128,7 +316,9 @@ class TTS_Deepgram:
         """
         url: str = "https://api.deepgram.com/v1/models"
         headers: dict[str, str] = {"Authorization": f"Token {self._apiKey}"}
-        response: requests.Response = requests.get(url, headers=headers)
+        response: requests.Response = self._session.get(
+            url, headers=headers, timeout=self._timeout.as_tuple()
+        )
         data: dict[str, Any] = response.json()
 
         voices: list[str] = []
@@ -1,23 +1,47 @@
 import io
-from typing import Any
+from functools import partial
+from typing import Any, Iterable, Optional
 
 import requests
 from pydub import AudioSegment
 from pydub.playback import play
 
+from ._http import fetch, fetch_stream, new_session
+from .audio_store import AudioStore, render_key, write_file
 from .audioPlayer import AudioPlayer
 from .exceptions import FileExtensionError, InvalidTokenError
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Timeout
 
 
 class TTS_ElevenLabs:
     """
     The TTS_ElevenLabs class provides text-to-speech synthesis using ElevenLabs API.
 
+    Instances are thread-safe. The voice can be passed per call, so a single
+    instance and its pooled HTTP session can serve concurrent requests;
+    set_voice() only changes the default for calls that do not pass one.
+
     Args:
         apiKey (str): The ElevenLabs API Key for authentication.
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
     """
 
-    def __init__(self, apiKey: str) -> None:
+    def __init__(
+        self,
+        apiKey: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
         # Check if API key is provided
         if not apiKey:
             raise ValueError("API key cannot be empty")
@@ -26,11 +50,19 @@ class TTS_ElevenLabs:
         self._voice: str = "UgBBYS2sOqTuMpoF3BR0"
         self._apiKey: str = apiKey
 
+        # Pooled HTTP session shared by all calls on this instance
+        self._session: requests.Session = new_session()
+
+        # Retries rate-limited, unavailable and timed-out synthesis requests
+        self._retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self._timeout: Timeout = timeout or Timeout()
+        self._cache: Optional[SharedCache] = cache
+
         # Validate provided API key by checking voices endpoint
         if not self._validate_token():
             raise InvalidTokenError("Invalid ElevenLabs API key")
 
-        # AudioPlayer instance (optional, in case you want to play raw bytes)
+        # AudioPlayer instance, used to play raw PCM in speak_stream()
         self._player: AudioPlayer = AudioPlayer()
 
     def _validate_token(self) -> bool:
@@ -41,7 +73,11 @@ class TTS_ElevenLabs:
             bool: True if API key is valid (status 200), else False.
         """
         headers: dict[str, str] = {"xi-api-key": self._apiKey}
-        response = requests.get("https://api.elevenlabs.io/v2/voices", headers=headers)
+        response = self._session.get(
+            "https://api.elevenlabs.io/v2/voices",
+            headers=headers,
+            timeout=self._timeout.as_tuple(),
+        )
         return response.status_code == 200
 
     def get_voice(self) -> str:
@@ -62,21 +98,124 @@ class TTS_ElevenLabs:
         """
         self._voice = voice
 
-    def _synthesize_speech(self, text: str) -> bytes:
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes speech for the provided text and returns the MP3 audio.
+
+        Args:
+            text (str): Text to synthesize.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            bytes: MP3 audio content.
+
+        Raises:
+            APIError: If the request fails after any retries.
+        """
+        return self._synthesize_speech(text, voice, timeout, cancel)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes speech for the provided text, returning the MP3 audio as it arrives.
+
+        Uses the streaming endpoint, which sends audio while later parts of the
+        text are still being generated.
+
+        Args:
+            text (str): Text to synthesize.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: Chunks of MP3 audio, produced as ElevenLabs sends
+            them. A cached result is returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If the request fails after any retries. Once audio has
+                arrived it is raised from the iteration, without retrying.
+        """
+        return cached_stream(
+            self._cache,
+            render_key("elevenlabs", voice or self._voice, {}, text),
+            partial(
+                fetch_stream, **self._request(text, voice, timeout, cancel, "/stream")
+            ),
+        )
+
+    def _synthesize_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
         """
         Sends a text-to-speech synthesis request to ElevenLabs and returns MP3 audio bytes.
 
         Args:
             text (str): Text to convert to speech.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
 
         Returns:
             bytes: MP3 audio content received from API.
 
         Raises:
-            Exception: If API responds with an error.
+            APIError: If the request fails after any retries; the subclass
+                tells whether it was rate limited, unavailable, rejected, etc.
+        """
+        # HTTP POST request to synthesize speech; errors are raised as typed
+        # APIError subclasses and retried according to the retry policy
+        return cached(
+            self._cache,
+            render_key("elevenlabs", voice or self._voice, {}, text),
+            partial(fetch, **self._request(text, voice, timeout, cancel)),
+        )
+
+    def _request(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        endpoint: str = "",
+    ) -> dict[str, Any]:
+        """
+        Returns the fetch() arguments of an ElevenLabs synthesis request.
+
+        Args:
+            text (str): Text to convert to speech.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            endpoint (str): Suffix of the text-to-speech URL, e.g. "/stream".
+
+        Returns:
+            dict: Keyword arguments for fetch() or fetch_stream().
         """
         # API URL with mp3 output format specified
-        ELEVENLABS_URL = f"https://api.elevenlabs.io/v1/text-to-speech/{self._voice}?output_format=mp3_22050_32"
+        ELEVENLABS_URL = f"https://api.elevenlabs.io/v1/text-to-speech/{voice or self._voice}{endpoint}?output_format=mp3_22050_32"
 
         headers: dict[str, str] = {
             "xi-api-key": self._apiKey,
@@ -89,23 +228,39 @@ class TTS_ElevenLabs:
             "model_id": "eleven_multilingual_v2",
         }
 
-        # HTTP POST request to synthesize speech
-        resp = requests.post(ELEVENLABS_URL, headers=headers, json=payload, stream=True)
-
-        # Raise error if API response is not successful
-        if resp.status_code != 200:
-            raise Exception(f"API Error: {resp.status_code} - {resp.text}")
-
-        # Return MP3 bytes content
-        return resp.content
+        return {
+            "session": self._session,
+            "method": "POST",
+            "url": ELEVENLABS_URL,
+            "retry_policy": self._retry_policy,
+            "timeout": timeout or self._timeout,
+            "cancel": cancel,
+            "headers": headers,
+            "json": payload,
+        }
 
-    def save(self, text: str, filename: str = "output.mp3") -> None:
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.mp3",
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes speech for the provided text and saves it as an MP3 file.
 
         Args:
             text (str): Text to synthesize.
             filename (str): Filename to save the MP3 as. Must end with '.mp3'.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: if filename does not end with '.mp3'.
@@ -114,28 +269,110 @@ class TTS_ElevenLabs:
         if not filename.endswith(".mp3"):
             raise FileExtensionError(message="Output file type should be .mp3")
 
+        if store is not None:
+            store.save(
+                filename,
+                "elevenlabs",
+                voice or self._voice,
+                {},
+                text,
+                partial(self._synthesize_speech, text, voice, timeout, cancel),
+            )
+            return
+
         # Get MP3 audio bytes from API
-        audio_bytes = self._synthesize_speech(text)
+        audio_bytes = self._synthesize_speech(text, voice, timeout, cancel)
 
         # Write bytes to file
-        with open(filename, "wb") as f:
-            f.write(audio_bytes)
-
-    def speak(self, text: str) -> None:
+        with stage("write"):
+            write_file(filename, audio_bytes)
+
+    @profiled
+    def speak(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
         Synthesizes speech for the text and plays it directly.
 
         Args:
             text (str): Text to synthesize and play.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
         """
         # Get MP3 bytes from API
-        mp3_data = self._synthesize_speech(text)
+        mp3_data = self._synthesize_speech(text, voice, timeout, cancel)
 
         # Load bytes as an AudioSegment for playback
-        audio_segment = AudioSegment.from_file(io.BytesIO(mp3_data), format="mp3")
+        with stage("decode"):
+            audio_segment = AudioSegment.from_file(io.BytesIO(mp3_data), format="mp3")
 
         # Play the audio using pydub playback
-        play(audio_segment)
+        with stage("playback"):
+            play(audio_segment)
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
+
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
+
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        stream_speech(
+            partial(self._synthesize_pcm, voice=voice, timeout=timeout, cancel=cancel),
+            self._player,
+            fragments,
+            cancel=cancel,
+        )
+
+    def _synthesize_pcm(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> tuple[bytes, int, int, int]:
+        """
+        Synthesizes speech and decodes the MP3 response into raw PCM.
+
+        Args:
+            text (str): Text to synthesize.
+            voice (str, optional): Voice ID for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            tuple: (raw_audio, channels, sample_width, frame_rate).
+        """
+        audio_segment = AudioSegment.from_file(
+            io.BytesIO(self._synthesize_speech(text, voice, timeout, cancel)),
+            format="mp3",
+        )
+        return (
+            audio_segment.raw_data,
+            audio_segment.channels,
+            audio_segment.sample_width,
+            audio_segment.frame_rate,
+        )
 
     def get_voices(self) -> list[str]:
         """
@@ -147,7 +384,9 @@ class TTS_ElevenLabs:
         url: str = "https://api.elevenlabs.io/v2/voices"
         headers: dict[str, str] = {"xi-api-key": self._apiKey}
 
-        response = requests.get(url, headers=headers)
+        response = self._session.get(
+            url, headers=headers, timeout=self._timeout.as_tuple()
+        )
         response.raise_for_status()
         data: dict[str, Any] = response.json()
 
@@ -1,22 +1,90 @@
+import base64
 import io
-from typing import Any
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Iterable, Iterator, Optional
 
-from gtts import gTTS
+import requests
+from gtts import gTTS, gTTSError
 from pydub import AudioSegment
 
+from ._http import error_from_status, fetch, new_session
+from .audio_store import AudioStore, render_key, write_file
 from .audioPlayer import AudioPlayer
-from .exceptions import FileExtensionError
+from .exceptions import APIError, FileExtensionError, ProviderUnavailableError
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Deadline, Timeout
+
+# The base64 MP3 inside the batchexecute response, as gTTS extracts it.
+_AUDIO_PATTERN = re.compile(rb'jQ1olc","\[\\"(.*)\\"]')
+
+# (channels, sample_width, frame_rate) of the PCM that MP3 audio is decoded to.
+_PCM_FORMAT: tuple[int, int, int] = (2, 2, 44100)
+
+# Segments are fetched concurrently through these gTTS internals. If a gTTS
+# release drops them, segments are fetched one by one through gTTS.stream().
+_CONCURRENT_SEGMENTS: bool = hasattr(gTTS, "_prepare_requests") and hasattr(
+    gTTS, "GOOGLE_TTS_HEADERS"
+)
+
+
+def _decode_segment(body: bytes) -> bytes:
+    """Extracts the MP3 audio from a gTTS batchexecute response."""
+    for line in body.splitlines():
+        if b"jQ1olc" in line:
+            match = _AUDIO_PATTERN.search(line)
+            if match:
+                return base64.b64decode(match.group(1))
+    raise APIError("API Error: no audio in gTTS response", 200)
 
 
 class TTS_Google:
     """
     The TTS_Google class provides functionality to synthesize text into speech using the gTTS library.
+
+    Instances are thread-safe. Language, TLD and speed can be passed per call,
+    so a single instance can serve concurrent requests; the setters only
+    change the defaults for calls that do not pass them.
+
+    gTTS splits text into segments of about 100 characters. They are fetched
+    concurrently over a pooled session, at most max_workers at a time per
+    instance, and speak() starts playing the first segment while the rest
+    are still downloading.
+
+    Args:
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        max_workers (int): Maximum segment requests in flight per instance.
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        max_workers: int = 4,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
         self._lang: str = "en"
         self._tld: str = ""
         self._slow: bool = False
+        self._retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self._timeout: Timeout = timeout or Timeout()
+        self._cache: Optional[SharedCache] = cache
+        self._session: requests.Session = new_session()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="speech-engine-gtts"
+        )
         self._player: AudioPlayer = AudioPlayer()
 
     def get_language(self) -> str:
@@ -76,48 +144,376 @@ class TTS_Google:
         """
         self._slow = slow
 
-    def _synthesize_speech(self, text: str) -> Any:
+    def _synthesize_speech(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+    ) -> Any:
         """
         Generates a gTTS audio object.
 
         Args:
             text (str): The text to be synthesized.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
 
         Returns:
             gTTS: gTTS object.
         """
-        if self._tld:
-            return gTTS(text=text, lang=self._lang, tld=self._tld, slow=self._slow)
+        lang = lang or self._lang
+        tld = tld or self._tld
+        slow = self._slow if slow is None else slow
+
+        if tld:
+            return gTTS(text=text, lang=lang, tld=tld, slow=slow)
+
+        return gTTS(text=text, lang=lang, slow=slow)
+
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes the given text into speech and returns the MP3 audio.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
 
-        return gTTS(text=text, lang=self._lang, slow=self._slow)
+        Returns:
+            bytes: The MP3 audio.
 
-    def speak(self, text: str) -> None:
+        Raises:
+            APIError: If the request fails after any retries.
         """
-        Synthesizes the given text into speech and plays it.
+        return cached(
+            self._cache,
+            self._render_key(text, lang, tld, slow),
+            lambda: b"".join(self._segments(text, lang, tld, slow, timeout, cancel)),
+        )
+
+    def synthesize_stream(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes the given text into speech, returning the MP3 audio as it arrives.
 
         Args:
             text (str): The text to be synthesized into speech.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: The MP3 audio of each gTTS segment, in order, as soon
+            as it and every earlier segment have arrived. A cached result is
+            returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If a segment fails after any retries; raised from the
+                iteration once earlier segments have been produced.
+        """
+        return cached_stream(
+            self._cache,
+            self._render_key(text, lang, tld, slow),
+            partial(self._segments, text, lang, tld, slow, timeout, cancel),
+        )
+
+    def _render_key(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+    ) -> str:
+        """Returns the render key of a call, after applying the defaults."""
+        return render_key(
+            "google",
+            lang or self._lang,
+            {"tld": tld or self._tld, "slow": self._slow if slow is None else slow},
+            text,
+        )
+
+    def _segments(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterator[bytes]:
         """
-        gtts: Any = self._synthesize_speech(text)
+        Fetches the gTTS segments of the text concurrently.
 
-        mp3_buffer: io.BytesIO = io.BytesIO()
-        gtts.write_to_fp(mp3_buffer)
-        mp3_buffer.seek(0)
+        Args:
+            text (str): The text to be synthesized.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Yields:
+            bytes: The MP3 audio of each segment, in order, as soon as it and
+            every earlier segment have arrived.
+        """
+        limits: Timeout = timeout or self._timeout
+        deadline: Deadline = Deadline(limits.total)
+        tts: Any = self._synthesize_speech(text, lang, tld, slow)
+        if not _CONCURRENT_SEGMENTS:
+            yield from self._stream_segments(tts, limits, deadline, cancel)
+            return
+
+        requests_: list[Any] = tts._prepare_requests()
+
+        futures: list[Future[bytes]] = [
+            self._executor.submit(
+                self._fetch_segment, request, limits, deadline, cancel
+            )
+            for request in requests_
+        ]
+        try:
+            for future in futures:
+                with stage("network"):
+                    audio: bytes = future.result()
+                yield audio
+        finally:
+            # Stop queued segments if a segment failed or the caller stopped early.
+            for future in futures:
+                future.cancel()
+
+    def _fetch_segment(
+        self,
+        request: requests.PreparedRequest,
+        limits: Timeout,
+        deadline: Deadline,
+        cancel: Optional[CancellationToken],
+    ) -> bytes:
+        """Sends one prepared gTTS request and returns the segment's MP3 audio."""
+        deadline.check()
+        body: bytes = fetch(
+            self._session,
+            "POST",
+            str(request.url),
+            self._retry_policy,
+            Timeout(limits.connect, limits.read, deadline.remaining()),
+            cancel,
+            data=request.body,
+            headers=gTTS.GOOGLE_TTS_HEADERS,
+        )
+        return _decode_segment(body)
+
+    @staticmethod
+    def _stream_segments(
+        tts: Any,
+        limits: Timeout,
+        deadline: Deadline,
+        cancel: Optional[CancellationToken],
+    ) -> Iterator[bytes]:
+        """
+        Fetches the segments one by one through the public gTTS.stream().
 
-        audio: Any = AudioSegment.from_mp3(mp3_buffer)
-        audio = audio.set_frame_rate(44100).set_sample_width(2).set_channels(2)
+        Used when gTTS lacks the internals needed to fetch segments concurrently.
+        Requests are not retried, and the deadline and cancel are checked
+        between segments.
+        """
+        tts.timeout = limits.as_tuple()
+        segments: Iterator[bytes] = tts.stream()
+        try:
+            while True:
+                if cancel:
+                    cancel.raise_if_cancelled()
+                deadline.check()
+                with stage("network"):
+                    audio: Optional[bytes] = next(segments, None)
+                if audio is None:
+                    return
+                yield audio
+        except gTTSError as e:
+            response: Any = getattr(e, "rsp", None)
+            if response is not None:
+                raise error_from_status(response.status_code, response.text) from e
+            raise ProviderUnavailableError(str(e)) from e
+
+    @profiled
+    def speak(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Synthesizes the given text into speech and plays it.
 
-        self._player.play_bytes(
-            audio.raw_data, channels=2, sample_width=2, frame_rate=44100
+        Args:
+            text (str): The text to be synthesized into speech.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        streamed: bool = False
+
+        # Segments play back to back through the jitter buffer as they arrive,
+        # so a segment that is still downloading delays playback instead of
+        # cutting it. The buffer is unbounded so that fetching never waits for
+        # playback.
+        with self._player.open_stream(
+            *_PCM_FORMAT, cancel=cancel, max_buffered=None
+        ) as stream:
+
+            def synthesize() -> bytes:
+                nonlocal streamed
+                streamed = True
+                segments: list[bytes] = []
+                for mp3 in self._segments(text, lang, tld, slow, timeout, cancel):
+                    segments.append(mp3)
+                    stream.write(self._decode_mp3(mp3)[0])
+                return b"".join(segments)
+
+            # On a cache miss the audio is cached as soon as every segment has
+            # arrived, while it is still playing; concurrent calls for the same
+            # text, in any process, wait for it instead of fetching it again.
+            audio: bytes = cached(
+                self._cache, self._render_key(text, lang, tld, slow), synthesize
+            )
+            if not streamed:
+                stream.write(self._decode_mp3(audio)[0])
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
+
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
+
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        stream_speech(
+            partial(
+                self._synthesize_pcm,
+                lang=lang,
+                tld=tld,
+                slow=slow,
+                timeout=timeout,
+                cancel=cancel,
+            ),
+            self._player,
+            fragments,
+            cancel=cancel,
         )
 
-    def save(self, text: str, filename: str = "output.mp3") -> None:
+    def _synthesize_pcm(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> tuple[bytes, int, int, int]:
+        """
+        Synthesizes the given text and decodes it into 44.1 kHz stereo PCM.
+
+        Args:
+            text (str): The text to be synthesized.
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            tuple: (raw_audio, channels, sample_width, frame_rate).
+        """
+        return self._decode_mp3(self.synthesize(text, lang, tld, slow, timeout, cancel))
+
+    @staticmethod
+    def _decode_mp3(mp3: bytes) -> tuple[bytes, int, int, int]:
+        """Decodes MP3 audio into 44.1 kHz stereo PCM."""
+        channels, sample_width, frame_rate = _PCM_FORMAT
+        with stage("decode"):
+            audio: Any = AudioSegment.from_mp3(io.BytesIO(mp3))
+            audio = (
+                audio.set_frame_rate(frame_rate)
+                .set_sample_width(sample_width)
+                .set_channels(channels)
+            )
+
+        return audio.raw_data, channels, sample_width, frame_rate
+
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.mp3",
+        lang: Optional[str] = None,
+        tld: Optional[str] = None,
+        slow: Optional[bool] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and saves it as an audio file.
 
         Args:
             text (str): The text to be synthesized into speech.
             filename (str): The filename to save the audio file (should have a .mp3 extension).
+            lang (str, optional): Language for this call; defaults to get_language().
+            tld (str, optional): TLD for this call; defaults to get_tld().
+            slow (bool, optional): Speed for this call; defaults to get_slow().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: If the provided filename doesn't have a .mp3 extension.
@@ -126,4 +522,17 @@ class TTS_Google:
         if not filename.endswith(".mp3"):
             raise FileExtensionError()
 
-        self._synthesize_speech(text).save(filename)
+        if store is not None:
+            store.save(
+                filename,
+                "google",
+                lang or self._lang,
+                {"tld": tld or self._tld, "slow": self._slow if slow is None else slow},
+                text,
+                partial(self.synthesize, text, lang, tld, slow, timeout, cancel),
+            )
+            return
+
+        audio: bytes = self.synthesize(text, lang, tld, slow, timeout, cancel)
+        with stage("write"):
+            write_file(filename, audio)
@@ -1,27 +1,119 @@
 import os
-from typing import Any
+import tempfile
+import time
+from contextlib import closing, contextmanager, nullcontext
+from functools import partial
+from typing import Any, ContextManager, Iterable, Iterator, Optional, Tuple
 
+import openai
 from openai import OpenAI
 from playsound3 import playsound
 
-from .exceptions import FileExtensionError
+from ._http import error_from_status
+from .audio_store import AudioStore, render_key, write_file
+from .audioPlayer import AudioPlayer
+from .exceptions import (
+    APIError,
+    FileExtensionError,
+    ProviderTimeoutError,
+    ProviderUnavailableError,
+    SynthesisCancelledError,
+)
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Deadline, Timeout
+
+
+@contextmanager
+def _provider_errors(
+    cancel: Optional[CancellationToken], started: float
+) -> Iterator[None]:
+    """Raises OpenAI client failures in the block as the matching APIError."""
+    try:
+        yield
+    except (APIError, SynthesisCancelledError):
+        raise
+    except Exception as e:
+        # Closing the response on cancellation surfaces as a transport
+        # error; report it as the cancellation it is.
+        if cancel and cancel.cancelled:
+            raise SynthesisCancelledError() from e
+        if isinstance(e, openai.APITimeoutError):
+            raise ProviderTimeoutError(
+                str(e), latency=time.monotonic() - started
+            ) from e
+        if isinstance(e, openai.APIConnectionError):
+            raise ProviderUnavailableError(
+                str(e), latency=time.monotonic() - started
+            ) from e
+        if isinstance(e, openai.APIStatusError):
+            raise error_from_status(
+                e.status_code,
+                e.response.text,
+                time.monotonic() - started,
+                e.response.headers.get("Retry-After"),
+            ) from e
+        raise
+
+
+def _closing_on_cancel(
+    response: Any, cancel: Optional[CancellationToken]
+) -> ContextManager[None]:
+    """Closes response if cancel is cancelled while the block runs."""
+    return cancel.on_cancel(response.close) if cancel else nullcontext()
+
+
+def _iter_chunks(
+    response: Any, deadline: Deadline, cancel: Optional[CancellationToken]
+) -> Iterator[bytes]:
+    """Reads a streamed response, checking cancel and the deadline between chunks."""
+    # Without a chunk size, httpx yields data as it arrives instead of
+    # collecting it into full-size chunks.
+    for chunk in response.iter_bytes():
+        if cancel:
+            cancel.raise_if_cancelled()
+        deadline.check()
+        yield chunk
 
 
 class TTS_Openai:
     """
     The TTS_Openai class provides functionality to synthesize text into speech using the OpenAI
 
+    Instances are thread-safe. The voice can be passed per call, so a single
+    instance and its OpenAI client can serve concurrent requests; set_voice()
+    only changes the default for calls that do not pass one.
+
     Args:
         apiKey (str): The Open AI API Key.
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
     """
 
-    def __init__(self, apiKey: str) -> None:
+    def __init__(
+        self,
+        apiKey: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
         if not apiKey:
             raise ValueError("API key cannot be empty")
 
         self._apiKey: str = apiKey
         self._voice: str = "alloy"
-        self._client: Any = OpenAI(api_key=apiKey)
+        # Retries are left to the retry policy rather than the OpenAI client.
+        self._client: Any = OpenAI(api_key=apiKey, max_retries=0)
+        self._retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self._timeout: Timeout = timeout or Timeout()
+        self._cache: Optional[SharedCache] = cache
+        self._player: AudioPlayer = AudioPlayer()
 
     def get_voice(self) -> str:
         """
@@ -41,28 +133,251 @@ class TTS_Openai:
         """
         self._voice = voice
 
-    def speak(self, text: str) -> None:
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes the given text into speech and returns the MP3 audio.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            bytes: The MP3 audio.
+
+        Raises:
+            APIError: If the request fails after any retries.
+        """
+        return self._synthesize_speech(text, voice, timeout=timeout, cancel=cancel)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes the given text into speech, returning the MP3 audio as it arrives.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: Chunks of the MP3 audio, produced as OpenAI sends
+            them. A cached result is returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If the request fails after any retries. Once audio has
+                arrived it is raised from the iteration, without retrying.
+        """
+        return cached_stream(
+            self._cache,
+            render_key("openai", voice or self._voice, {"format": "mp3"}, text),
+            partial(self._stream_speech, text, voice, "mp3", timeout, cancel),
+        )
+
+    def _synthesize_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        response_format: str = "mp3",
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """Fetch TTS audio bytes from the OpenAI API."""
+        limits: Timeout = timeout or self._timeout
+        deadline: Deadline = Deadline(limits.total)
+
+        def attempt() -> bytes:
+            with _provider_errors(cancel, time.monotonic()):
+                response: Any = self._open_response(
+                    text, voice, response_format, limits, deadline, cancel
+                )
+                with closing(response), _closing_on_cancel(response, cancel):
+                    return b"".join(_iter_chunks(response, deadline, cancel))
+
+        def request() -> bytes:
+            with stage("network"):
+                return self._retry_policy.call(attempt, deadline, cancel)
+
+        return cached(
+            self._cache,
+            render_key(
+                "openai", voice or self._voice, {"format": response_format}, text
+            ),
+            request,
+        )
+
+    def _stream_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        response_format: str = "mp3",
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterator[bytes]:
+        """
+        Streams TTS audio bytes from the OpenAI API.
+
+        Failures are retried until the first chunk has arrived; after that they
+        are raised from the iteration without retrying.
+        """
+        limits: Timeout = timeout or self._timeout
+        deadline: Deadline = Deadline(limits.total)
+
+        def attempt() -> Tuple[Any, Iterator[bytes], bytes]:
+            with _provider_errors(cancel, time.monotonic()):
+                response: Any = self._open_response(
+                    text, voice, response_format, limits, deadline, cancel
+                )
+                try:
+                    chunks = _iter_chunks(response, deadline, cancel)
+                    with _closing_on_cancel(response, cancel):
+                        return response, chunks, next(chunks, b"")
+                except BaseException:
+                    response.close()
+                    raise
+
+        with stage("network"):
+            response, chunks, first = self._retry_policy.call(attempt, deadline, cancel)
+        with closing(response), _closing_on_cancel(response, cancel), _provider_errors(
+            cancel, time.monotonic()
+        ):
+            if first:
+                yield first
+            yield from chunks
+
+    def _open_response(
+        self,
+        text: str,
+        voice: Optional[str],
+        response_format: str,
+        limits: Timeout,
+        deadline: Deadline,
+        cancel: Optional[CancellationToken],
+    ) -> Any:
+        """Sends a speech request and returns the streamed response, unread."""
+        if cancel:
+            cancel.raise_if_cancelled()
+        deadline.check()
+        # Entered by hand so the response can outlive the attempt that opened
+        # it; callers close it once it has been read.
+        return self._client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=voice or self._voice,
+            input=text,
+            response_format=response_format,
+            timeout=openai.Timeout(
+                deadline.clamp(limits.read),
+                connect=deadline.clamp(limits.connect),
+            ),
+        ).__enter__()
+
+    def _synthesize_pcm(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> tuple[bytes, int, int, int]:
+        """Fetch raw PCM (24 kHz, 16-bit, mono) from the OpenAI API."""
+        return self._synthesize_speech(text, voice, "pcm", timeout, cancel), 1, 2, 24000
+
+    @profiled
+    def speak(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and plays it.
 
         Args:
             text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
         """
-        response: Any = self._client.audio.speech.create(
-            model="tts-1", voice=self._voice, input=text
+        audio: bytes = self._synthesize_speech(
+            text, voice, timeout=timeout, cancel=cancel
         )
 
-        response.stream_to_file("speech.mp3")
-        playsound("speech.mp3")
-        os.remove("speech.mp3")
+        # A unique file per call, so concurrent calls never overwrite each other.
+        fd, path = tempfile.mkstemp(suffix=".mp3")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            with stage("playback"):
+                playsound(path)
+        finally:
+            os.remove(path)
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
+
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
 
-    def save(self, text: str, filename: str = "output.mp3") -> None:
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        stream_speech(
+            partial(self._synthesize_pcm, voice=voice, timeout=timeout, cancel=cancel),
+            self._player,
+            fragments,
+            cancel=cancel,
+        )
+
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.mp3",
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and saves it as an audio file.
 
         Args:
             text (str): The text to be synthesized into speech.
             filename (str): The filename to save the audio file (should have a .mp3 extension).
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: If the provided filename doesn't have a .mp3 extension.
@@ -71,11 +386,24 @@ class TTS_Openai:
         if filename.split(".")[-1] != "mp3":
             raise FileExtensionError()
 
-        response: Any = self._client.audio.speech.create(
-            model="tts-1", voice=self._voice, input=text
-        )
+        if store is not None:
+            store.save(
+                filename,
+                "openai",
+                voice or self._voice,
+                {},
+                text,
+                partial(
+                    self._synthesize_speech, text, voice, timeout=timeout, cancel=cancel
+                ),
+            )
+            return
 
-        response.stream_to_file(filename)
+        audio: bytes = self._synthesize_speech(
+            text, voice, timeout=timeout, cancel=cancel
+        )
+        with stage("write"):
+            write_file(filename, audio)
 
     def get_voices(self) -> list[str]:
         """
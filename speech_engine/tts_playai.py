@@ -4,32 +4,64 @@ import io
 import os
 import subprocess
 import wave
-from typing import List
+from functools import partial
+from typing import Any, Iterable, List, Optional, Tuple
 
 import requests
 
+from ._http import fetch, fetch_stream, new_session
+from .audio_store import AudioStore, render_key, write_file
 from .audioPlayer import AudioPlayer
 from .exceptions import FileExtensionError, InvalidTokenError
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Timeout
 
 
 class TTS_Playai:
     """
     The TTS_Playai class provides functionality to synthesize text into speech using Playai.
 
+    Instances are thread-safe. The voice can be passed per call, so a single
+    instance and its pooled HTTP session can serve concurrent requests;
+    set_voice() only changes the default for calls that do not pass one.
+
     Args:
         apiKey (str): The GROQ API Key.
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
     """
 
     _voice: str
     _apiKey: str
+    _session: requests.Session
+    _retry_policy: RetryPolicy
+    _timeout: Timeout
+    _cache: Optional[SharedCache]
     _player: AudioPlayer
 
-    def __init__(self, apiKey: str) -> None:
+    def __init__(
+        self,
+        apiKey: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
         if not apiKey:
             raise ValueError("API key cannot be empty")
 
         self._voice = "Arista-PlayAI"
         self._apiKey = apiKey
+        self._session = new_session()
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._timeout = timeout or Timeout()
+        self._cache = cache
         if not self._validate_token():
             raise InvalidTokenError()
         self._player = AudioPlayer()
@@ -42,8 +74,10 @@ class TTS_Playai:
             bool: True if the token is valid, False otherwise.
         """
         headers: dict[str, str] = {"Authorization": f"Bearer {self._apiKey}"}
-        response = requests.get(
-            "https://api.groq.com/openai/v1/models", headers=headers
+        response = self._session.get(
+            "https://api.groq.com/openai/v1/models",
+            headers=headers,
+            timeout=self._timeout.as_tuple(),
         )
         return response.status_code == 200
 
@@ -65,8 +99,85 @@ class TTS_Playai:
         """
         self._voice = voice
 
-    def _synthesize_speech(self, text: str) -> bytes:
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes the given text into speech and returns the WAV audio.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            bytes: The WAV audio.
+
+        Raises:
+            APIError: If the request fails after any retries.
+        """
+        return self._synthesize_speech(text, voice, timeout, cancel)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes the given text into speech, returning the WAV audio as it arrives.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: Chunks of the WAV audio, produced as Groq sends
+            them. A cached result is returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If the request fails after any retries. Once audio has
+                arrived it is raised from the iteration, without retrying.
+        """
+        return cached_stream(
+            self._cache,
+            render_key("playai", voice or self._voice, {}, text),
+            partial(fetch_stream, **self._request(text, voice, timeout, cancel)),
+        )
+
+    def _synthesize_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
         """Fetch TTS audio bytes from the Playai API."""
+        return cached(
+            self._cache,
+            render_key("playai", voice or self._voice, {}, text),
+            partial(fetch, **self._request(text, voice, timeout, cancel)),
+        )
+
+    def _request(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> dict[str, Any]:
+        """Returns the fetch() arguments of a Playai synthesis request."""
         GROQ_URL = "https://api.groq.com/openai/v1/audio/speech"
         headers: dict[str, str] = {
             "Authorization": f"Bearer {self._apiKey}",
@@ -75,24 +186,43 @@ class TTS_Playai:
         payload: dict[str, str] = {
             "model": "playai-tts",
             "input": text,
-            "voice": self._voice,
+            "voice": voice or self._voice,
             "response_format": "wav",
         }
 
-        resp = requests.post(GROQ_URL, headers=headers, json=payload, stream=True)
-
-        if resp.status_code != 200:
-            raise Exception(f"API Error: {resp.status_code} - {resp.text}")
-
-        return resp.content
+        return {
+            "session": self._session,
+            "method": "POST",
+            "url": GROQ_URL,
+            "retry_policy": self._retry_policy,
+            "timeout": timeout or self._timeout,
+            "cancel": cancel,
+            "headers": headers,
+            "json": payload,
+        }
 
-    def save(self, text: str, filename: str = "output.wav") -> None:
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.wav",
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and saves it as an audio file.
 
         Args:
             text (str): The text to be synthesized into speech.
             filename (str): The filename to save the audio file (must have a .wav extension).
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: If the filename doesn't have a .wav extension.
@@ -100,25 +230,87 @@ class TTS_Playai:
         if not filename.endswith(".wav"):
             raise FileExtensionError(message="Output file type should be .wav")
 
-        with open(filename, "wb") as f:
-            f.write(self._synthesize_speech(text))
+        if store is not None:
+            store.save(
+                filename,
+                "playai",
+                voice or self._voice,
+                {},
+                text,
+                partial(self._synthesize_speech, text, voice, timeout, cancel),
+            )
+            return
+
+        audio: bytes = self._synthesize_speech(text, voice, timeout, cancel)
+        with stage("write"):
+            write_file(filename, audio)
 
-    def speak(self, text: str) -> None:
+    @profiled
+    def speak(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and plays it.
 
         Args:
             text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
         """
-        audio = io.BytesIO(self._synthesize_speech(text))
+        self._player.play_bytes(
+            *self._synthesize_pcm(text, voice, timeout, cancel), cancel=cancel
+        )
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
+
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
+
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        stream_speech(
+            partial(self._synthesize_pcm, voice=voice, timeout=timeout, cancel=cancel),
+            self._player,
+            fragments,
+            cancel=cancel,
+        )
+
+    def _synthesize_pcm(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Tuple[bytes, int, int, int]:
+        """Synthesizes text and decodes the WAV response into raw PCM."""
+        audio = io.BytesIO(self._synthesize_speech(text, voice, timeout, cancel))
 
-        with wave.open(audio, "rb") as wav_file:
+        with stage("decode"), wave.open(audio, "rb") as wav_file:
             channels: int = wav_file.getnchannels()
             sample_width: int = wav_file.getsampwidth()
             frame_rate: int = wav_file.getframerate()
             raw_audio: bytes = wav_file.readframes(wav_file.getnframes())
 
-        self._player.play_bytes(raw_audio, channels, sample_width, frame_rate)
+        return raw_audio, channels, sample_width, frame_rate
 
     def get_voices(self) -> List[str]:
         """
@@ -1,22 +1,47 @@
 import io
 import wave
-from typing import Any, Optional
+from functools import partial
+from typing import Any, Iterable, Optional
 
 import requests
 
+from ._http import fetch, fetch_stream, new_session
+from .audio_store import AudioStore, render_key, write_file
 from .audioPlayer import AudioPlayer
 from .exceptions import FileExtensionError, InvalidTokenError
+from .profiling import profiled, stage
+from .retry import RetryPolicy
+from .shared_cache import SharedCache, cached, cached_stream
+from .streaming import stream_speech
+from .timeouts import CancellationToken, Timeout
 
 
 class TTS_Witai:
     """
     The TTS_Witai class provides functionality to synthesize text into speech using the wit.ai
 
+    Instances are thread-safe. Voice, speed and pitch can be passed per call,
+    so a single instance and its pooled HTTP session can serve concurrent
+    requests; the setters only change the defaults for calls that do not pass
+    them.
+
     Args:
         authToken (str): The Wit.ai auth token.
+        retry_policy (RetryPolicy, optional): Retry policy for synthesis requests;
+            defaults to RetryPolicy().
+        timeout (Timeout, optional): Default time limits for provider calls;
+            defaults to Timeout().
+        cache (SharedCache, optional): Cache of synthesis results shared across
+            processes; see speech_engine.shared_cache.
     """
 
-    def __init__(self, authToken: str) -> None:
+    def __init__(
+        self,
+        authToken: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: Optional[Timeout] = None,
+        cache: Optional[SharedCache] = None,
+    ) -> None:
         if not authToken:
             raise ValueError("Auth Token cannot be empty")
 
@@ -25,6 +50,10 @@ class TTS_Witai:
         self._request_headers: dict[str, str] = {
             "Authorization": f"Bearer {self._auth_token}"
         }
+        self._session: requests.Session = new_session()
+        self._retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self._timeout: Timeout = timeout or Timeout()
+        self._cache: Optional[SharedCache] = cache
 
         if not self._validate_token():
             raise InvalidTokenError()
@@ -99,59 +128,265 @@ class TTS_Witai:
             "Authorization": f"Bearer {self._auth_token}",
         }
         return (
-            requests.get(
-                "https://api.wit.ai/voices?v=20220622", headers=headers
+            self._session.get(
+                "https://api.wit.ai/voices?v=20220622",
+                headers=headers,
+                timeout=self._timeout.as_tuple(),
             ).status_code
             == 200
         )
 
-    def _prepare_payload(self, text: str) -> dict[str, Any]:
-        """Prepares the request payload for text-to-speech synthesis."""
-        payload: dict[str, Any] = {"q": text, "voice": self._voice}
-        if self._speed:
-            payload["speed"] = self._speed
-        if self._pitch:
-            payload["pitch"] = self._pitch
+    def _prepare_payload(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Prepares the request payload, falling back to the instance defaults."""
+        speed = speed or self._speed
+        pitch = pitch or self._pitch
+        payload: dict[str, Any] = {"q": text, "voice": voice or self._voice}
+        if speed:
+            payload["speed"] = speed
+        if pitch:
+            payload["pitch"] = pitch
         return payload
 
-    def _synthesize_speech(self, text: str) -> bytes:
+    @profiled
+    def synthesize(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
+        """
+        Synthesizes the given text into speech and returns the WAV audio.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            speed (int, optional): Speed for this call; defaults to get_speed().
+            pitch (int, optional): Pitch for this call; defaults to get_pitch().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            bytes: The WAV audio.
+
+        Raises:
+            APIError: If the request fails after any retries.
+        """
+        return self._synthesize_speech(text, voice, speed, pitch, timeout, cancel)
+
+    def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterable[bytes]:
+        """
+        Synthesizes the given text into speech, returning the WAV audio as it arrives.
+
+        Args:
+            text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            speed (int, optional): Speed for this call; defaults to get_speed().
+            pitch (int, optional): Pitch for this call; defaults to get_pitch().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+
+        Returns:
+            Iterable[bytes]: Chunks of the WAV audio, produced as Wit.ai sends
+            them. A cached result is returned whole, as a one-element tuple.
+
+        Raises:
+            APIError: If the request fails after any retries. Once audio has
+                arrived it is raised from the iteration, without retrying.
+        """
+        return cached_stream(
+            self._cache,
+            self._render_key(text, voice, speed, pitch),
+            partial(
+                fetch_stream,
+                **self._request(text, voice, speed, pitch, timeout, cancel),
+            ),
+        )
+
+    def _synthesize_speech(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> bytes:
         """Calls Wit.ai API to synthesize speech and returns the raw audio content."""
-        resp: requests.Response = requests.post(
-            "https://api.wit.ai/synthesize",
-            params={"v": self._api_version},
-            headers=self._request_headers,
-            json=self._prepare_payload(text),
+        return cached(
+            self._cache,
+            self._render_key(text, voice, speed, pitch),
+            partial(fetch, **self._request(text, voice, speed, pitch, timeout, cancel)),
         )
 
-        if resp.status_code != 200:
-            raise Exception(f"API Error: {resp.status_code} - {resp.text}")
+    def _render_key(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+    ) -> str:
+        """Returns the render key of a call, after applying the defaults."""
+        return render_key(
+            "witai",
+            voice or self._voice,
+            {"speed": speed or self._speed, "pitch": pitch or self._pitch},
+            text,
+        )
 
-        return resp.content
+    def _request(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> dict[str, Any]:
+        """Returns the fetch() arguments of a Wit.ai synthesis request."""
+        return {
+            "session": self._session,
+            "method": "POST",
+            "url": "https://api.wit.ai/synthesize",
+            "retry_policy": self._retry_policy,
+            "timeout": timeout or self._timeout,
+            "cancel": cancel,
+            "params": {"v": self._api_version},
+            "headers": self._request_headers,
+            "json": self._prepare_payload(text, voice, speed, pitch),
+        }
 
-    def speak(self, text: str) -> None:
+    @profiled
+    def speak(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and plays it.
 
         Args:
             text (str): The text to be synthesized into speech.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            speed (int, optional): Speed for this call; defaults to get_speed().
+            pitch (int, optional): Pitch for this call; defaults to get_pitch().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        self._player.play_bytes(
+            *self._synthesize_pcm(text, voice, speed, pitch, timeout, cancel),
+            cancel=cancel,
+        )
+
+    def speak_stream(
+        self,
+        fragments: Iterable[str],
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
         """
-        audio: io.BytesIO = io.BytesIO(self._synthesize_speech(text))
+        Speaks text that arrives in pieces, such as tokens streamed from an LLM.
 
-        with wave.open(audio, "rb") as wav_file:
+        Fragments are grouped into phrases; each phrase is synthesized as soon
+        as it is complete and played in order while later ones are generated.
+
+        Args:
+            fragments (Iterable[str]): The text fragments, in order.
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            speed (int, optional): Speed for this call; defaults to get_speed().
+            pitch (int, optional): Pitch for this call; defaults to get_pitch().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+        """
+        stream_speech(
+            partial(
+                self._synthesize_pcm,
+                voice=voice,
+                speed=speed,
+                pitch=pitch,
+                timeout=timeout,
+                cancel=cancel,
+            ),
+            self._player,
+            fragments,
+            cancel=cancel,
+        )
+
+    def _synthesize_pcm(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> tuple[bytes, int, int, int]:
+        """Synthesizes text and decodes the WAV response into raw PCM."""
+        audio: io.BytesIO = io.BytesIO(
+            self._synthesize_speech(text, voice, speed, pitch, timeout, cancel)
+        )
+
+        with stage("decode"), wave.open(audio, "rb") as wav_file:
             channels: int = wav_file.getnchannels()
             sample_width: int = wav_file.getsampwidth()
             frame_rate: int = wav_file.getframerate()
             raw_audio: bytes = wav_file.readframes(wav_file.getnframes())
 
-        self._player.play_bytes(raw_audio, channels, sample_width, frame_rate)
-
-    def save(self, text: str, filename: str = "output.wav") -> None:
+        return raw_audio, channels, sample_width, frame_rate
+
+    @profiled
+    def save(
+        self,
+        text: str,
+        filename: str = "output.wav",
+        voice: Optional[str] = None,
+        speed: Optional[int] = None,
+        pitch: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[CancellationToken] = None,
+        store: Optional[AudioStore] = None,
+    ) -> None:
         """
         Synthesizes the given text into speech and saves it as an audio file.
 
         Args:
             text (str): The text to be synthesized into speech.
             filename (str): The filename to save the audio file (must have a .wav extension).
+            voice (str, optional): Voice for this call; defaults to get_voice().
+            speed (int, optional): Speed for this call; defaults to get_speed().
+            pitch (int, optional): Pitch for this call; defaults to get_pitch().
+            timeout (Timeout, optional): Time limits for this call; defaults to the
+                engine's timeout.
+            cancel (CancellationToken, optional): Cancels this call when triggered.
+            store (AudioStore, optional): Save through this content-addressed store,
+                so a render already stored is not synthesized or written again.
 
         Raises:
             FileExtensionError: If the filename doesn't have a .wav extension.
@@ -159,8 +394,24 @@ class TTS_Witai:
         if not filename.endswith(".wav"):
             raise FileExtensionError(message="Output file type should be .wav")
 
-        with open(filename, "wb") as f:
-            f.write(self._synthesize_speech(text))
+        if store is not None:
+            store.save(
+                filename,
+                "witai",
+                voice or self._voice,
+                {"speed": speed or self._speed, "pitch": pitch or self._pitch},
+                text,
+                partial(
+                    self._synthesize_speech, text, voice, speed, pitch, timeout, cancel
+                ),
+            )
+            return
+
+        audio: bytes = self._synthesize_speech(
+            text, voice, speed, pitch, timeout, cancel
+        )
+        with stage("write"):
+            write_file(filename, audio)
 
     def get_voices(self) -> list[str]:
         """
@@ -169,9 +420,10 @@ class TTS_Witai:
         Returns:
             list: A list of available voices.
         """
-        response: requests.Response = requests.get(
+        response: requests.Response = self._session.get(
             f"https://api.wit.ai/voices?v={self._api_version}",
             headers=self._request_headers,
+            timeout=self._timeout.as_tuple(),
         )
         resp: dict[str, Any] = response.json()
 
@@ -0,0 +1,166 @@
+"""Tests for speech_engine.audio_store, on a store in a temporary directory."""
+
+import errno
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+
+from speech_engine import audio_store
+from speech_engine.audio_store import AudioStore, render_key, write_file
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[AudioStore]:
+    with AudioStore(str(tmp_path / "store")) as store:
+        yield store
+
+
+def _put(store: AudioStore, text: str, audio: bytes) -> str:
+    key = render_key("test", "voice", {}, text)
+    store.put(key, audio, "test", "voice", {}, text)
+    return key
+
+
+def test_identical_audio_is_stored_once(store: AudioStore) -> None:
+    first = _put(store, "hello", b"audio")
+    second = _put(store, "hello again", b"audio")
+    _put(store, "other", b"other audio")
+
+    assert store.get(first) == store.get(second) == b"audio"
+    assert store.path(first) == store.path(second)
+    assert store.stats() == {
+        "renders": 3,
+        "blobs": 2,
+        "stored_bytes": len(b"audio") + len(b"other audio"),
+        "logical_bytes": 2 * len(b"audio") + len(b"other audio"),
+        "unreferenced": 0,
+    }
+
+
+def test_save_synthesizes_once_and_links(store: AudioStore, tmp_path: Path) -> None:
+    calls: List[str] = []
+
+    def synthesize() -> bytes:
+        calls.append("synthesize")
+        return b"audio"
+
+    for name in ("a.wav", "b.wav"):
+        store.save(str(tmp_path / name), "test", "voice", {}, "hello", synthesize)
+
+    assert calls == ["synthesize"]
+    assert (tmp_path / "a.wav").read_bytes() == b"audio"
+    assert os.path.samefile(tmp_path / "a.wav", tmp_path / "b.wav")
+    assert (tmp_path / "a.wav").stat().st_mode & 0o222 == 0
+
+
+def test_refcounts_follow_renders(store: AudioStore) -> None:
+    key = _put(store, "hello", b"first")
+    _put(store, "hello", b"first")
+    assert store.stats()["unreferenced"] == 0
+
+    # Re-rendering the same key with new audio drops the old blob's reference.
+    _put(store, "hello", b"second")
+
+    assert store.get(key) == b"second"
+    assert store.stats()["blobs"] == 2
+    assert store.stats()["unreferenced"] == 1
+
+
+def test_release_and_compact(store: AudioStore, tmp_path: Path) -> None:
+    first = _put(store, "hello", b"audio")
+    second = _put(store, "hello again", b"audio")
+    blob = store.path(first)
+    assert blob is not None
+    exported = str(tmp_path / "exported.wav")
+    assert store.export(first, exported)
+
+    assert store.release(first)
+    assert not store.release(first)
+    assert store.compact() == 0
+    assert store.get(second) == b"audio"
+
+    assert store.release(second)
+    assert store.stats()["unreferenced"] == 1
+    assert store.compact() == len(b"audio")
+
+    assert not os.path.exists(blob)
+    assert store.get(second) is None
+    assert store.stats() == {
+        "renders": 0,
+        "blobs": 0,
+        "stored_bytes": 0,
+        "logical_bytes": 0,
+        "unreferenced": 0,
+    }
+    # An exported file is a link of its own and outlives the blob.
+    with open(exported, "rb") as f:
+        assert f.read() == b"audio"
+
+
+def test_compact_removes_stale_temporary_files(store: AudioStore) -> None:
+    stale = os.path.join(store.root, "tmp", "stale")
+    fresh = os.path.join(store.root, "tmp", "fresh")
+    for path in (stale, fresh):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+    old = time.time() - 2 * audio_store._STALE_TMP_SECONDS
+    os.utime(stale, (old, old))
+
+    assert store.compact() == len(b"partial")
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+
+
+def test_export_falls_back_to_copy(
+    store: AudioStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    key = _put(store, "hello", b"audio")
+
+    def cross_device_link(*args: Any, **kwargs: Any) -> None:
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(audio_store.os, "link", cross_device_link)
+    target = tmp_path / "copy.wav"
+
+    assert store.export(key, str(target))
+    assert target.read_bytes() == b"audio"
+    assert target.stat().st_nlink == 1
+    assert not store.export(render_key("test", "voice", {}, "missing"), str(target))
+
+
+def test_export_replaces_leftover_temporary_file(
+    store: AudioStore, tmp_path: Path
+) -> None:
+    key = _put(store, "hello", b"audio")
+    target = tmp_path / "output.wav"
+    Path(audio_store._temp_path(str(target))).write_bytes(b"partial")
+
+    assert store.export(key, str(target))
+    assert target.read_bytes() == b"audio"
+
+
+def test_write_file_keeps_linked_blobs(store: AudioStore, tmp_path: Path) -> None:
+    key = _put(store, "hello", b"audio")
+    exported = tmp_path / "exported.wav"
+    store.export(key, str(exported))
+
+    write_file(str(exported), b"new audio")
+
+    assert exported.read_bytes() == b"new audio"
+    assert store.get(key) == b"audio"
+
+
+def test_write_file_writes_unlinked_files_in_place(tmp_path: Path) -> None:
+    target = tmp_path / "output.wav"
+    target.write_bytes(b"old")
+    os.chmod(target, 0o640)
+    inode = target.stat().st_ino
+
+    write_file(str(target), b"new")
+
+    assert target.read_bytes() == b"new"
+    assert target.stat().st_ino == inode
+    assert target.stat().st_mode & 0o777 == 0o640
@@ -0,0 +1,210 @@
+"""Tests for speech_engine.serve, against the offline stub engine."""
+
+import asyncio
+import http.client
+import io
+import json
+import socket
+import threading
+import time
+import wave
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import pytest
+
+from speech_engine.serve import SpeechServer, default_engines
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture
+def start_server() -> Iterator[Callable[..., int]]:
+    """Returns a function starting a server on its own event loop thread."""
+    running: List[Tuple[asyncio.AbstractEventLoop, threading.Thread]] = []
+
+    def start(stub_latency: float = 0.0, **kwargs: Any) -> int:
+        loop = asyncio.new_event_loop()
+        server = SpeechServer(
+            default_engines(stub=True, stub_latency=stub_latency), **kwargs
+        )
+        listener = loop.run_until_complete(server.start("127.0.0.1", 0))
+        thread = threading.Thread(
+            target=_serve, args=(loop, server, listener), daemon=True
+        )
+        thread.start()
+        running.append((loop, thread))
+        port: int = listener.sockets[0].getsockname()[1]
+        return port
+
+    yield start
+    for loop, thread in running:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+
+def _serve(
+    loop: asyncio.AbstractEventLoop, server: SpeechServer, listener: asyncio.Server
+) -> None:
+    """Runs the loop until stopped, then closes the server and its connections."""
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+    listener.close()
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    server.close()
+    loop.close()
+
+
+def _request(port: int, method: str, path: str, body: bytes = b"") -> Response:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def _synthesize(port: int, **payload: Any) -> Response:
+    return _request(port, "POST", "/synthesize", json.dumps(payload).encode())
+
+
+def _metrics(port: int) -> Dict[str, float]:
+    status, _, body = _request(port, "GET", "/metrics")
+    assert status == 200
+    return {
+        name: float(value)
+        for name, _, value in (
+            line.rpartition(" ")
+            for line in body.decode().splitlines()
+            if not line.startswith("#")
+        )
+    }
+
+
+def _wait_for(port: int, metric: str, value: float) -> None:
+    deadline = time.monotonic() + 5
+    while _metrics(port).get(metric) != value:
+        assert time.monotonic() < deadline, f"{metric} never reached {value}"
+        time.sleep(0.02)
+
+
+def test_synthesize_streams_audio(start_server: Callable[..., int]) -> None:
+    port = start_server()
+
+    status, headers, body = _synthesize(port, engine="stub", text="Hello, world!")
+
+    assert status == 200
+    assert headers["Content-Type"] == "audio/wav"
+    assert headers["Transfer-Encoding"] == "chunked"
+    with wave.open(io.BytesIO(body)) as wav_file:
+        # 50 ms of audio per character.
+        assert wav_file.getnframes() == 24000 * 13 // 20
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [
+        (b"not json", 400),
+        (json.dumps({"engine": "stub"}).encode(), 400),
+        (json.dumps({"engine": "stub", "text": ""}).encode(), 400),
+        (json.dumps({"engine": "stub", "text": "hi", "options": [1]}).encode(), 400),
+        (json.dumps({"engine": "stub", "text": "hi", "voice": 5}).encode(), 400),
+        (
+            json.dumps(
+                {"engine": "stub", "text": "hi", "options": {"timeout": 5}}
+            ).encode(),
+            400,
+        ),
+        (json.dumps({"engine": "missing", "text": "hi"}).encode(), 404),
+    ],
+)
+def test_invalid_requests(
+    start_server: Callable[..., int], body: bytes, status: int
+) -> None:
+    port = start_server()
+
+    response_status, headers, response_body = _request(
+        port, "POST", "/synthesize", body
+    )
+
+    assert response_status == status
+    assert headers["Content-Type"] == "application/json"
+    assert "error" in json.loads(response_body)
+
+
+def test_unknown_path(start_server: Callable[..., int]) -> None:
+    port = start_server()
+
+    assert _request(port, "GET", "/missing")[0] == 404
+
+
+def test_body_too_large(start_server: Callable[..., int]) -> None:
+    port = start_server()
+
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(b"POST /synthesize HTTP/1.1\r\nContent-Length: 2000000\r\n\r\n")
+        status_line = sock.makefile("rb").readline()
+
+    assert status_line.split()[1] == b"413"
+
+
+def test_rejects_when_queue_is_full(start_server: Callable[..., int]) -> None:
+    port = start_server(stub_latency=1.0, max_concurrency=1, max_queue=1)
+    responses: List[Response] = []
+
+    def synthesize() -> None:
+        responses.append(_synthesize(port, engine="stub", text="hi"))
+
+    running = threading.Thread(target=synthesize)
+    running.start()
+    _wait_for(port, "speech_engine_in_flight", 1)
+    queued = threading.Thread(target=synthesize)
+    queued.start()
+    _wait_for(port, "speech_engine_queue_depth", 1)
+
+    status, headers, _ = _synthesize(port, engine="stub", text="hi")
+    running.join()
+    queued.join()
+
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert [response[0] for response in responses] == [200, 200]
+    assert _metrics(port)["speech_engine_rejected_total"] == 1
+
+
+def test_no_queue_still_serves_free_slots(start_server: Callable[..., int]) -> None:
+    port = start_server(max_concurrency=1, max_queue=0)
+
+    assert _synthesize(port, engine="stub", text="hi")[0] == 200
+
+
+def test_metrics(start_server: Callable[..., int]) -> None:
+    port = start_server()
+    _, _, audio = _synthesize(port, engine="stub", text="hi")
+
+    metrics = _metrics(port)
+
+    assert metrics['speech_engine_requests_total{engine="stub",status="200"}'] == 1
+    assert metrics['speech_engine_audio_bytes_total{engine="stub"}'] == len(audio)
+    assert metrics['speech_engine_synthesis_seconds_count{engine="stub"}'] == 1
+    assert metrics["speech_engine_in_flight"] == 0
+    assert metrics["speech_engine_queue_depth"] == 0
+
+
+def test_disconnect_cancels_synthesis(start_server: Callable[..., int]) -> None:
+    port = start_server(stub_latency=10.0, max_concurrency=1)
+    body = json.dumps({"engine": "stub", "text": "hi"}).encode()
+
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(
+            b"POST /synthesize HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body)
+            + body
+        )
+        _wait_for(port, "speech_engine_in_flight", 1)
+
+    _wait_for(port, "speech_engine_in_flight", 0)
+    metrics = _metrics(port)
+    assert metrics['speech_engine_requests_total{engine="stub",status="499"}'] == 1
@@ -0,0 +1,181 @@
+"""Tests for speech_engine.shared_cache, including forked worker processes."""
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from speech_engine.audio_store import render_key
+from speech_engine.shared_cache import SharedCache, cached_stream
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="SharedCache requires a POSIX system"
+)
+
+
+@pytest.fixture
+def cache_path(tmp_path: Path) -> str:
+    return str(tmp_path / "speech.cache")
+
+
+def _key(i: int) -> str:
+    return render_key("test", None, {}, f"prompt {i}")
+
+
+def _audio(i: int) -> bytes:
+    """Audio of a distinct length and content for every prompt."""
+    return bytes([i % 251]) * (100 + 37 * i)
+
+
+def test_get_put_and_stats(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=1 << 20, slots=64)
+
+    assert cache.get(_key(1)) is None
+    assert cache.put(_key(1), _audio(1))
+    assert cache.get(_key(1)) == _audio(1)
+    assert cache.get(_key(2)) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 2, 1)
+    assert stats["size"] == 1 << 20
+    assert stats["written"] > len(_audio(1))
+    cache.close()
+
+
+def test_put_replaces_the_key(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=1 << 20, slots=64)
+
+    cache.put(_key(1), b"first")
+    cache.put(_key(1), b"second")
+
+    assert cache.get(_key(1)) == b"second"
+    cache.close()
+
+
+def test_put_larger_than_cache(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=4096, slots=16)
+
+    assert not cache.put(_key(1), bytes(4096))
+    assert cache.get(_key(1)) is None
+    cache.close()
+
+
+def test_reopen_shares_entries(cache_path: str) -> None:
+    writer = SharedCache(cache_path, size=1 << 20, slots=64)
+    writer.put(_key(1), _audio(1))
+
+    # The size and slots of an existing file win over the arguments.
+    reader = SharedCache(cache_path, size=4096, slots=16)
+
+    assert reader.get(_key(1)) == _audio(1)
+    assert reader.stats()["size"] == 1 << 20
+    writer.close()
+    reader.close()
+
+
+def test_ring_wraparound_never_returns_overwritten_audio(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=8192, slots=64)
+
+    for i in range(200):
+        cache.put(_key(i), _audio(i))
+        for j in range(max(0, i - 60), i + 1):
+            audio = cache.get(_key(j))
+            assert audio is None or audio == _audio(j)
+
+    # The newest record always survives; records a full ring back do not.
+    assert cache.get(_key(199)) == _audio(199)
+    assert cache.get(_key(0)) is None
+    assert cache.stats()["written"] > 8192
+    cache.close()
+
+
+def test_damaged_record_is_a_miss(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=1 << 20, slots=64)
+    audio = b"\x01\x02\x03" * 100
+    cache.put(_key(1), audio)
+    cache.close()
+
+    with open(cache_path, "r+b") as f:
+        data = f.read()
+        f.seek(data.index(audio) + 10)
+        f.write(b"\xff")
+
+    cache = SharedCache(cache_path)
+    assert cache.get(_key(1)) is None
+    cache.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_processes_synthesize_each_key_once(
+    cache_path: str, tmp_path: Path
+) -> None:
+    keys = 40
+    processes = 8
+    log = str(tmp_path / "syntheses.log")
+    # Opened before forking: every child must reopen it rather than share
+    # the parent's locks.
+    cache = SharedCache(cache_path, size=1 << 20, slots=256)
+    cache.get(_key(0))
+
+    children: List[int] = []
+    for seed in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                order = list(range(keys))
+                random.Random(seed).shuffle(order)
+                for i in order:
+
+                    def synthesize(i: int = i) -> bytes:
+                        with open(log, "a") as f:
+                            f.write(f"{i}\n")
+                        time.sleep(0.01)
+                        return _audio(i)
+
+                    if cache.get_or_synthesize(_key(i), synthesize) != _audio(i):
+                        break
+                else:
+                    status = 0
+            finally:
+                os._exit(status)
+        children.append(pid)
+
+    for pid in children:
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+    with open(log) as f:
+        synthesized = f.read().split()
+    assert sorted(map(int, synthesized)) == list(range(keys))
+    assert all(cache.get(_key(i)) == _audio(i) for i in range(keys))
+    cache.close()
+
+
+def test_cached_stream(cache_path: str) -> None:
+    cache = SharedCache(cache_path, size=1 << 20, slots=64)
+    calls: List[int] = []
+
+    def stream() -> Iterator[bytes]:
+        calls.append(1)
+        yield b"first "
+        yield b"second"
+
+    # A stream abandoned part way is not stored.
+    chunks = iter(cached_stream(cache, _key(1), stream))
+    assert next(chunks) == b"first "
+    del chunks
+    assert cache.get(_key(1)) is None
+
+    miss = cached_stream(cache, _key(1), stream)
+    assert not isinstance(miss, tuple)
+    assert list(miss) == [b"first ", b"second"]
+
+    assert cached_stream(cache, _key(1), stream) == (b"first second",)
+    assert list(cached_stream(None, _key(1), stream)) == [b"first ", b"second"]
+    assert len(calls) == 3
+    cache.close()
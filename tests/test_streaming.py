@@ -0,0 +1,125 @@
+"""Tests for speech_engine.streaming, played through a fake PyAudio device."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+import pytest
+
+from speech_engine import audioPlayer
+from speech_engine.audioPlayer import AudioPlayer
+from speech_engine.exceptions import SynthesisCancelledError
+from speech_engine.streaming import PCMAudio, split_phrases, stream_speech
+from speech_engine.timeouts import CancellationToken
+
+FRAME_RATE = 16000
+BYTES_PER_SECOND = FRAME_RATE * 2
+
+
+class _FakeStream:
+    """An output stream that consumes audio in real time, like a device."""
+
+    def __init__(self, bytes_per_second: int, written: bytearray) -> None:
+        self._bytes_per_second = bytes_per_second
+        self._written = written
+
+    def write(self, data: bytes) -> None:
+        self._written += data
+        time.sleep(len(data) / self._bytes_per_second)
+
+    def stop_stream(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _FakePyAudio:
+    written = bytearray()
+
+    def get_format_from_width(self, width: int) -> int:
+        return width
+
+    def open(self, format: int, channels: int, rate: int, output: bool) -> _FakeStream:
+        return _FakeStream(rate * channels * format, self.written)
+
+
+@pytest.fixture
+def player(monkeypatch: pytest.MonkeyPatch) -> AudioPlayer:
+    _FakePyAudio.written = bytearray()
+    monkeypatch.setattr(audioPlayer.pyaudio, "PyAudio", _FakePyAudio)
+    return AudioPlayer()
+
+
+def _tone(seconds: float, value: int) -> PCMAudio:
+    return bytes([value]) * int(seconds * BYTES_PER_SECOND), 1, 2, FRAME_RATE
+
+
+def _run(
+    player: AudioPlayer,
+    synthesize: Callable[[str], PCMAudio],
+    fragments: List[str],
+    cancel: Optional[CancellationToken] = None,
+) -> List[BaseException]:
+    """Runs stream_speech on a thread, failing the test if it does not return."""
+    errors: List[BaseException] = []
+
+    def target() -> None:
+        try:
+            stream_speech(synthesize, player, fragments, cancel=cancel)
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "stream_speech did not return"
+    return errors
+
+
+def test_split_phrases() -> None:
+    fragments = ["Hello there, ", "how are", " you today? I am ", "fine."]
+    assert list(split_phrases(fragments)) == [
+        "Hello there, how are you today?",
+        "I am fine.",
+    ]
+
+
+def test_plays_phrases_in_order(player: AudioPlayer) -> None:
+    phrases = ["The first phrase is here. ", "The second phrase is here. "]
+    values = {phrase.strip(): i + 1 for i, phrase in enumerate(phrases)}
+
+    errors = _run(player, lambda phrase: _tone(0.2, values[phrase]), phrases)
+
+    assert errors == []
+    audio = bytes(_FakePyAudio.written).replace(b"\0", b"")
+    assert audio == _tone(0.2, 1)[0] + _tone(0.2, 2)[0]
+
+
+def test_synthesis_error_is_raised(player: AudioPlayer) -> None:
+    def synthesize(phrase: str) -> PCMAudio:
+        raise RuntimeError("synthesis failed")
+
+    errors = _run(player, synthesize, ["The first phrase is here. "] * 5)
+
+    assert len(errors) == 1
+    assert isinstance(errors[0], RuntimeError)
+
+
+def test_cancel_during_final_playback(player: AudioPlayer) -> None:
+    # Both phrases are synthesized at once, so the cancellation arrives after
+    # the last phrase was queued, while its buffered audio is still playing.
+    cancel = CancellationToken()
+    threading.Timer(1.0, cancel.cancel).start()
+    started = time.monotonic()
+
+    errors = _run(
+        player,
+        lambda phrase: _tone(3.0, 1),
+        ["The first phrase is here. ", "The second phrase is here. "],
+        cancel,
+    )
+
+    assert len(errors) == 1
+    assert isinstance(errors[0], SynthesisCancelledError)
+    assert time.monotonic() - started < 3.0